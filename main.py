@@ -6,9 +6,13 @@ This script simulates the seven layers of the OSI model using Python.
 It can be run in either server or client mode.
 """
 import sys
-import time
+import atexit
 import argparse
+import queue
+import selectors
+import threading
 import logging
+import logging.handlers
 from typing import List
 
 from osi import OSILayer
@@ -21,14 +25,26 @@ from osi.presentation import PresentationLayer
 from osi.application import ApplicationLayer, HTTPRequest, HTTPResponse, index_handler, echo_handler, time_handler
 
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+# Configure logging. Records are queued and written by a background thread,
+# so logging from the layers never blocks the send/receive path on stdio.
+log_queue = queue.Queue(-1)
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
-)
+))
+log_listener = logging.handlers.QueueListener(log_queue, log_handler)
+queue_handler = logging.handlers.QueueHandler(log_queue)
+# Leave the full formatting to the listener's handler
+queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger('osi_model')
 
+# How long the client waits for each response before moving on
+RESPONSE_TIMEOUT = 5.0
+
 
 def create_osi_stack(is_server: bool = False, host: str = 'localhost', port: int = 12345) -> List[OSILayer]:
     """
@@ -99,6 +115,8 @@ def run_server(host: str = 'localhost', port: int = 12345) -> None:
     application_layer.add_route('/', index_handler)
     application_layer.add_route('/echo', echo_handler)
     application_layer.add_route('/time', time_handler)
+    application_layer.freeze_routes()
+    application_layer.auto_flush = False
     logger.info("Added route handlers: /, /echo, /time")
     
     # Initialize the physical layer
@@ -107,14 +125,17 @@ def run_server(host: str = 'localhost', port: int = 12345) -> None:
     print("Server is running. Press Ctrl+C to stop.")
     logger.info("Server is running. Waiting for connections...")
     
+    # Block on the connected socket until data arrives instead of polling
+    selector = selectors.DefaultSelector()
+    selector.register(physical_layer.fileno(), selectors.EVENT_READ)
+    
     try:
         # Main server loop
-        while True:
-            # Receive data from the client
-            physical_layer.send_up()
-            
-            # Sleep to avoid high CPU usage
-            time.sleep(0.1)
+        while physical_layer.connected:
+            for _key, _events in selector.select(timeout=None):
+                # Handle every frame that has arrived, then answer them together
+                physical_layer.drain()
+                application_layer.flush_responses()
     
     except KeyboardInterrupt:
         logger.info("Server shutdown initiated by user")
@@ -122,6 +143,8 @@ def run_server(host: str = 'localhost', port: int = 12345) -> None:
     
     finally:
         # Close the connection
+        selector.unregister(physical_layer.fileno())
+        selector.close()
         physical_layer.close()
         logger.info("Server shutdown complete")
 
@@ -149,6 +172,18 @@ def run_client(host: str = 'localhost', port: int = 12345) -> None:
     application_layer.remote_ip = host
     application_layer.remote_port = port
     
+    # Receive in the background so each response is handled as soon as it arrives
+    def receive_loop():
+        try:
+            while physical_layer.connected:
+                physical_layer.send_up()
+        except OSError:
+            # The socket was closed while we were waiting for data
+            pass
+    
+    receiver = threading.Thread(target=receive_loop, name='osi-receiver', daemon=True)
+    receiver.start()
+    
     try:
         # Define a callback to handle responses
         def handle_response(response):
@@ -156,41 +191,36 @@ def run_client(host: str = 'localhost', port: int = 12345) -> None:
             print(f"Headers: {response.headers}")
             print(f"Body: {response.body}")
         
+        def send_and_wait(request):
+            # Send a request and wait until its response has been handled
+            done = threading.Event()
+            
+            def callback(response):
+                handle_response(response)
+                done.set()
+            
+            application_layer.send_request(request, callback)
+            if not done.wait(RESPONSE_TIMEOUT):
+                logger.warning(f"No response to {request.method} {request.path} within {RESPONSE_TIMEOUT} seconds")
+                print(f"\nNo response received for {request.path}")
+        
         # Send a request to the index route
         logger.info("Sending request to /")
         print("\nSending request to /")
         request = HTTPRequest('GET', '/', {'User-Agent': 'OSI-Model-Client'})
-        application_layer.send_request(request, handle_response)
-        
-        # Wait for the response and process it
-        time.sleep(1)
-        for _ in range(5):  # Try multiple times to receive the response
-            physical_layer.send_up()
-            time.sleep(0.2)
+        send_and_wait(request)
         
         # Send a request to the echo route
         logger.info("Sending request to /echo")
         print("\nSending request to /echo")
         request = HTTPRequest('POST', '/echo', {'Content-Type': 'text/plain'}, 'Hello, OSI Model!')
-        application_layer.send_request(request, handle_response)
-        
-        # Wait for the response and process it
-        time.sleep(1)
-        for _ in range(5):  # Try multiple times to receive the response
-            physical_layer.send_up()
-            time.sleep(0.2)
+        send_and_wait(request)
         
         # Send a request to the time route
         logger.info("Sending request to /time")
         print("\nSending request to /time")
         request = HTTPRequest('GET', '/time', {'User-Agent': 'OSI-Model-Client'})
-        application_layer.send_request(request, handle_response)
-        
-        # Wait for the response and process it
-        time.sleep(1)
-        for _ in range(5):  # Try multiple times to receive the response
-            physical_layer.send_up()
-            time.sleep(0.2)
+        send_and_wait(request)
         
         logger.info("All requests completed")
         print("\nAll requests completed.")
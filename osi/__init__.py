@@ -3,12 +3,14 @@ OSI Model Simulation Package.
 This package contains implementations of all seven layers of the OSI model.
 """
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 
 class OSILayer(ABC):
     """Base class for all OSI layers."""
     
+    __slots__ = ('name', 'lower_layer', 'upper_layer')
+    
     def __init__(self, name: str):
         """Initialize the OSI layer with a name."""
         self.name = name
@@ -31,6 +33,20 @@ class OSILayer(ABC):
         """
         pass
     
+    def send_down_batch(self, items: List[Any], **kwargs) -> None:
+        """
+        Send several pieces of data down, all with the same parameters.
+        
+        This sends each item with send_down(); layers that can pass a whole batch
+        to the layer below in one go override it.
+        
+        Args:
+            items: The pieces of data to send, in order
+            **kwargs: Parameters applied to every item, as for send_down()
+        """
+        for data in items:
+            self.send_down(data, **kwargs)
+    
     @abstractmethod
     def send_up(self, data: Any, **kwargs) -> None:
         """
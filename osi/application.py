@@ -5,10 +5,57 @@ The Application Layer is the top layer in the OSI model.
 It provides network services directly to end-users or applications.
 """
 from typing import Any, Dict, Optional, Tuple, List, Callable
+import sys
 import time
+import itertools
 import json
+import types
+import logging
+from collections import deque
 
 from osi import OSILayer
+import utils
+
+
+logger = logging.getLogger(__name__)
+
+# Shared header dicts for the built-in handlers; treat them as read-only
+_CT_PLAIN = {sys.intern("Content-Type"): sys.intern("text/plain")}
+_CT_HTML = {sys.intern("Content-Type"): sys.intern("text/html")}
+
+# Header that carries the id used to match a response to its request
+_REQUEST_ID_HEADER = sys.intern("X-Req-Id")
+
+# Body of the index page
+_INDEX_BODY = "<html><body><h1>Welcome to the OSI Model Simulation</h1></body></html>"
+
+# The last second time_handler formatted, and its text: [epoch_seconds, text]
+_TS_CACHE = [0, ""]
+
+
+def _format_http(start_line: str, headers: Dict[str, str], body: str) -> bytes:
+    """
+    Format an HTTP message in its wire form.
+    
+    Args:
+        start_line: The request or status line
+        headers: The HTTP headers
+        body: The message body
+        
+    Returns:
+        The encoded message
+    """
+    # Build the message in a single buffer rather than joining intermediate strings
+    buf = bytearray(start_line.encode('utf-8'))
+    buf += b'\r\n'
+    for name, value in headers.items():
+        buf += name.encode('utf-8')
+        buf += b': '
+        buf += str(value).encode('utf-8')
+        buf += b'\r\n'
+    buf += b'\r\n'
+    buf += body.encode('utf-8')
+    return bytes(buf)
 
 
 class HTTPRequest:
@@ -18,6 +65,8 @@ class HTTPRequest:
     Contains method, path, headers, and body.
     """
     
+    __slots__ = ('method', 'path', 'headers', 'body')
+    
     def __init__(self, method: str, path: str, headers: Dict[str, str] = None, body: str = ''):
         """
         Initialize an HTTP request.
@@ -45,17 +94,35 @@ class HTTPRequest:
     @classmethod
     def from_dict(cls, data: Dict) -> 'HTTPRequest':
         """Create a request from a dictionary."""
+        # Intern the path and header names so they can be matched by identity
         return cls(
             data['method'],
-            data['path'],
-            data['headers'],
+            sys.intern(data['path']),
+            {sys.intern(k): v for k, v in data['headers'].items()},
             data['body']
         )
     
+    def to_bytes(self) -> bytes:
+        """Serialize the request to JSON bytes for transmission."""
+        return utils.serialize_dict({
+            'method': self.method,
+            'path': self.path,
+            'headers': self.headers,
+            'body': self.body
+        })
+    
+    @classmethod
+    def from_bytes(cls, request_bytes: bytes) -> 'HTTPRequest':
+        """Create a request from JSON bytes received from the Presentation layer."""
+        return cls.from_dict(utils.deserialize_dict(request_bytes))
+    
+    def __bytes__(self) -> bytes:
+        """The request in HTTP/1.1 wire format."""
+        return _format_http(f"{self.method} {self.path} HTTP/1.1", self.headers, self.body)
+    
     def __str__(self) -> str:
         """String representation of the request."""
-        headers_str = '\n'.join(f"{k}: {v}" for k, v in self.headers.items())
-        return f"{self.method} {self.path} HTTP/1.1\n{headers_str}\n\n{self.body}"
+        return bytes(self).decode('utf-8')
 
 
 class HTTPResponse:
@@ -65,6 +132,8 @@ class HTTPResponse:
     Contains status code, status message, headers, and body.
     """
     
+    __slots__ = ('status_code', 'status_message', 'headers', 'body')
+    
     def __init__(self, status_code: int, status_message: str, headers: Dict[str, str] = None, body: str = ''):
         """
         Initialize an HTTP response.
@@ -99,10 +168,66 @@ class HTTPResponse:
             data['body']
         )
     
+    def to_bytes(self) -> bytes:
+        """Serialize the response to JSON bytes for transmission."""
+        return utils.serialize_dict({
+            'status_code': self.status_code,
+            'status_message': self.status_message,
+            'headers': self.headers,
+            'body': self.body
+        })
+    
+    @classmethod
+    def from_bytes(cls, response_bytes: bytes) -> 'HTTPResponse':
+        """Create a response from JSON bytes received from the Presentation layer."""
+        return cls.from_dict(utils.deserialize_dict(response_bytes))
+    
+    def __bytes__(self) -> bytes:
+        """The response in HTTP/1.1 wire format."""
+        return _format_http(f"HTTP/1.1 {self.status_code} {self.status_message}", self.headers, self.body)
+    
     def __str__(self) -> str:
         """String representation of the response."""
-        headers_str = '\n'.join(f"{k}: {v}" for k, v in self.headers.items())
-        return f"HTTP/1.1 {self.status_code} {self.status_message}\n{headers_str}\n\n{self.body}"
+        return bytes(self).decode('utf-8')
+
+
+class _HTTPResponsePool:
+    """
+    A free list of reusable HTTPResponse objects.
+    
+    Responses are serialized as soon as they are queued, so the object itself can be
+    refilled for the next request instead of being allocated again.
+    """
+    
+    def __init__(self, size: int = 256):
+        """
+        Initialize the pool.
+        
+        Args:
+            size: The maximum number of idle responses to keep
+        """
+        # deque append/pop are atomic, so the pool is safe to share between threads
+        self._free = deque(maxlen=size)
+    
+    def get(self, status_code: int, status_message: str, headers: Dict[str, str], body: str) -> HTTPResponse:
+        """Get a response filled with the given fields, reusing an idle one if possible."""
+        try:
+            response = self._free.pop()
+        except IndexError:
+            return HTTPResponse(status_code, status_message, headers, body)
+        
+        response.status_code = status_code
+        response.status_message = status_message
+        response.headers = headers
+        response.body = body
+        return response
+    
+    def put(self, response: HTTPResponse) -> None:
+        """Return a response that is no longer referenced to the pool."""
+        self._free.append(response)
+
+
+_RESPONSE_POOL = _HTTPResponsePool()
 
 
 class ApplicationLayer(OSILayer):
@@ -122,20 +247,50 @@ class ApplicationLayer(OSILayer):
         super().__init__("Application")
         self.is_server = is_server
         self.routes = {}
+        # (path, handler) pairs scanned by handle_request
+        self._routes_tuple: Tuple[Tuple[str, Callable[[HTTPRequest], HTTPResponse]], ...] = ()
         self.session_id = None
         self.remote_ip = None
         self.remote_port = None
-        self.response_callbacks = {}
+        # Callbacks for in-flight requests, keyed by request id
+        self.response_callbacks: Dict[int, Callable[[HTTPResponse], None]] = {}
+        self._next_request_id = itertools.count(1)
+        # Serialized responses waiting to be sent together by flush_responses()
+        self._pending_responses: List[bytes] = []
+        # Whether send_up flushes responses itself; callers that receive several
+        # frames per wakeup turn this off and call flush_responses() once
+        self.auto_flush = True
+        # The Presentation layer's send_down, bound once when the stack is wired
+        self.send_fast: Optional[Callable[..., None]] = None
+    
+    def set_lower_layer(self, layer: OSILayer) -> None:
+        """Set the lower layer and bind its entry point for the send path."""
+        super().set_lower_layer(layer)
+        self.send_fast = layer.send_down
     
     def add_route(self, path: str, handler: Callable[[HTTPRequest], HTTPResponse]) -> None:
         """
         Add a route handler.
         
+        The response a handler returns is reused once it has been sent, so handlers
+        must not keep a reference to it.
+        
         Args:
             path: The route path
             handler: The handler function
         """
+        path = sys.intern(path)
         self.routes[path] = handler
+        self._routes_tuple = tuple(self.routes.items())
+    
+    def freeze_routes(self) -> None:
+        """
+        Make the route table read-only once all routes have been added.
+        
+        After this, add_route raises TypeError.
+        """
+        self._routes_tuple = tuple(self.routes.items())
+        self.routes = types.MappingProxyType(self.routes)
     
     def handle_request(self, request: HTTPRequest) -> HTTPResponse:
         """
@@ -147,14 +302,15 @@ class ApplicationLayer(OSILayer):
         Returns:
             The HTTP response
         """
-        # Find a handler for the path
-        handler = self.routes.get(request.path)
-        
-        if handler:
-            return handler(request)
+        # Find a handler for the path; with only a few routes a linear scan beats
+        # hashing, and interned paths usually match on identity alone
+        path = request.path
+        for route_path, handler in self._routes_tuple:
+            if route_path is path or route_path == path:
+                return handler(request)
         
         # No handler found, return 404
-        return HTTPResponse(404, "Not Found", {"Content-Type": "text/plain"}, "404 Not Found")
+        return _RESPONSE_POOL.get(404, "Not Found", _CT_PLAIN, "404 Not Found")
     
     def send_request(self, request: HTTPRequest, callback: Optional[Callable[[HTTPResponse], None]] = None) -> None:
         """
@@ -165,22 +321,21 @@ class ApplicationLayer(OSILayer):
             callback: A callback function to handle the response
         """
         if self.is_server:
-            print(f"[{self.name}] Cannot send request, this is a server")
+            logger.warning("[%s] Cannot send request, this is a server", self.name)
             return
         
-        print(f"[{self.name}] Sending {request.method} request to {request.path}")
+        logger.debug("[%s] Sending %s request to %s", self.name, request.method, request.path)
         
-        # Store the callback
+        # Tag the request so its response can be matched to the callback
+        request_id = next(self._next_request_id)
+        request.headers[_REQUEST_ID_HEADER] = str(request_id)
         if callback:
-            self.response_callbacks[request.path] = callback
-        
-        # Convert the request to a dictionary
-        request_dict = request.to_dict()
+            self.response_callbacks[request_id] = callback
         
-        # Send the request down to the Presentation layer
-        if self.lower_layer:
-            self.lower_layer.send_down(
-                request_dict,
+        # Send the serialized request down to the Presentation layer
+        if self.send_fast is not None:
+            self.send_fast(
+                request.to_bytes(),
                 data_format=3,  # JSON
                 session_id=self.session_id,
                 remote_ip=self.remote_ip,
@@ -189,24 +344,37 @@ class ApplicationLayer(OSILayer):
     
     def send_response(self, response: HTTPResponse) -> None:
         """
-        Send an HTTP response.
+        Queue an HTTP response for sending.
+        
+        Queued responses are sent together by flush_responses(), so several
+        responses produced for one batch of requests share a single message.
         
         Args:
             response: The HTTP response to send
         """
         if not self.is_server:
-            print(f"[{self.name}] Cannot send response, this is a client")
+            logger.warning("[%s] Cannot send response, this is a client", self.name)
+            return
+        
+        logger.debug("[%s] Queueing response: %s %s", self.name, response.status_code, response.status_message)
+        
+        # Serialize now so the response object can be reused by its handler
+        self._pending_responses.append(response.to_bytes())
+    
+    def flush_responses(self) -> None:
+        """Send all queued responses down to the Presentation layer as one JSON array."""
+        if not self._pending_responses:
             return
         
-        print(f"[{self.name}] Sending response: {response.status_code} {response.status_message}")
+        pending = self._pending_responses
+        self._pending_responses = []
         
-        # Convert the response to a dictionary
-        response_dict = response.to_dict()
+        logger.debug("[%s] Sending %s response(s)", self.name, len(pending))
         
-        # Send the response down to the Presentation layer
-        if self.lower_layer:
-            self.lower_layer.send_down(
-                response_dict,
+        # Send the batch down to the Presentation layer
+        if self.send_fast is not None:
+            self.send_fast(
+                b'[' + b','.join(pending) + b']',
                 data_format=3,  # JSON
                 session_id=self.session_id
             )
@@ -221,8 +389,8 @@ class ApplicationLayer(OSILayer):
         """
         # In a real implementation, this would be called by the user application
         # For simplicity, we'll just pass the data down to the Presentation layer
-        if self.lower_layer:
-            self.lower_layer.send_down(data, **kwargs)
+        if self.send_fast is not None:
+            self.send_fast(data, **kwargs)
     
     def send_up(self, data: Any, **kwargs) -> None:
         """
@@ -241,68 +409,102 @@ class ApplicationLayer(OSILayer):
         
         # Handle HTTP messages
         if data_format == 3:  # JSON
-            if isinstance(data, dict):
-                # Check if this is a request or response
-                if 'method' in data and 'path' in data:
-                    # This is a request
-                    request = HTTPRequest.from_dict(data)
-                    print(f"[{self.name}] Received {request.method} request for {request.path}")
-                    
-                    # Handle the request
-                    response = self.handle_request(request)
-                    
-                    # Send the response
-                    self.send_response(response)
-                
-                elif 'status_code' in data and 'status_message' in data:
-                    # This is a response
-                    response = HTTPResponse.from_dict(data)
-                    print(f"[{self.name}] Received response: {response.status_code} {response.status_message}")
-                    
-                    # Find and call the callback
-                    path = kwargs.get('path', '')
-                    callback = self.response_callbacks.get(path)
-                    if callback:
-                        callback(response)
-                        del self.response_callbacks[path]
-                    else:
-                        # Try to find a callback for any path
-                        for path, callback in list(self.response_callbacks.items()):
-                            callback(response)
-                            del self.response_callbacks[path]
-                            break
+            # Decode messages that reach us still serialized
+            if isinstance(data, (bytes, bytearray)):
+                data = utils.deserialize_dict(data)
+            
+            # A batch of messages arrives as a JSON array
+            messages = data if isinstance(data, list) else [data]
+            for message in messages:
+                if isinstance(message, dict):
+                    self._handle_http_message(message)
+            
+            # Send the responses for the whole batch at once
+            if self.auto_flush:
+                self.flush_responses()
         
         # In a real implementation, we would pass the data up to the user application
-        # For simplicity, we'll just print it
-        print(f"[{self.name}] Received data: {data}")
+        # For simplicity, we'll just log it
+        logger.debug("[%s] Received data: %s", self.name, data)
+    
+    def _handle_http_message(self, data: Dict) -> None:
+        """
+        Handle a single decoded HTTP request or response.
+        
+        Args:
+            data: The decoded message
+        """
+        # Check if this is a request or response
+        if 'method' in data and 'path' in data:
+            # This is a request
+            request = HTTPRequest.from_dict(data)
+            logger.debug("[%s] Received %s request for %s", self.name, request.method, request.path)
+            
+            # Handle the request
+            response = self.handle_request(request)
+            
+            # Echo the request id; copy the headers since handlers may share the dict
+            request_id = request.headers.get(_REQUEST_ID_HEADER)
+            if request_id is not None:
+                headers = dict(response.headers)
+                headers[_REQUEST_ID_HEADER] = request_id
+                response.headers = headers
+            
+            # Queue the response; it is serialized, so the object can be reused
+            self.send_response(response)
+            _RESPONSE_POOL.put(response)
+        
+        elif 'status_code' in data and 'status_message' in data:
+            # This is a response
+            response = HTTPResponse.from_dict(data)
+            logger.debug("[%s] Received response: %s %s", self.name, response.status_code, response.status_message)
+            
+            # Find and call the callback for the request this answers
+            request_id = response.headers.get(_REQUEST_ID_HEADER)
+            callback = None
+            if request_id:
+                try:
+                    callback = self.response_callbacks.pop(int(request_id), None)
+                except (TypeError, ValueError):
+                    # Not one of ours; our ids are always integers
+                    logger.warning("[%s] Ignoring response with unknown request id %r", self.name, request_id)
+            if callback:
+                callback(response)
 
 
 # Example route handlers
 def index_handler(request: HTTPRequest) -> HTTPResponse:
     """Handle requests to the index route."""
-    return HTTPResponse(
+    return _RESPONSE_POOL.get(
         200,
         "OK",
-        {"Content-Type": "text/html"},
-        "<html><body><h1>Welcome to the OSI Model Simulation</h1></body></html>"
+        _CT_HTML,
+        _INDEX_BODY
     )
 
 
 def echo_handler(request: HTTPRequest) -> HTTPResponse:
     """Echo the request body back to the client."""
-    return HTTPResponse(
+    return _RESPONSE_POOL.get(
         200,
         "OK",
-        {"Content-Type": "text/plain"},
+        _CT_PLAIN,
         request.body
     )
 
 
 def time_handler(request: HTTPRequest) -> HTTPResponse:
     """Return the current server time."""
-    return HTTPResponse(
+    # Only reformat the timestamp when the second changes
+    now = int(time.time())
+    cache = _TS_CACHE
+    if cache[0] != now:
+        cache[0] = now
+        cache[1] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+    
+    return _RESPONSE_POOL.get(
         200,
         "OK",
-        {"Content-Type": "text/plain"},
-        f"The current time is: {time.strftime('%Y-%m-%d %H:%M:%S')}"
+        _CT_PLAIN,
+        f"The current time is: {cache[1]}"
     ) 
\ No newline at end of file
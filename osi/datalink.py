@@ -4,13 +4,25 @@ Data Link Layer Implementation.
 The Data Link Layer is responsible for node-to-node data transfer.
 It handles framing, physical addressing (MAC), and error detection.
 """
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple, List, Union
 import struct
+import logging
 
 from osi import OSILayer
 import utils
 
 
+logger = logging.getLogger(__name__)
+
+# Frame header: src MAC, dst MAC, payload length, CRC-32 checksum
+_FRAME_HDR = struct.Struct('!6s6sII')
+
+
+def _as_parts(data: Union[bytes, List[bytes]]) -> List[bytes]:
+    """Get a payload as a list of buffers, whether it was given as one buffer or several."""
+    return data if isinstance(data, list) else [data]
+
+
 class Frame:
     """
     A data link layer frame.
@@ -18,47 +30,71 @@ class Frame:
     Contains source and destination MAC addresses, payload data, and a checksum.
     """
     
-    def __init__(self, src_mac: str, dst_mac: str, data: bytes):
+    def __init__(self, src_mac: str, dst_mac: str, data: Union[bytes, List[bytes]],
+                 src_mac_raw: Optional[bytes] = None, dst_mac_raw: Optional[bytes] = None,
+                 checksum: Optional[int] = None):
         """
         Initialize a frame with source and destination MAC addresses and data.
         
         Args:
             src_mac: Source MAC address
             dst_mac: Destination MAC address
-            data: Payload data
+            data: Payload data, as one buffer or a list of buffers sent back to back
+            src_mac_raw: The source MAC already packed to 6 bytes, if the caller has it
+            dst_mac_raw: The destination MAC already packed to 6 bytes, if the caller has it
+            checksum: The payload's CRC-32, if already known; computed from the data otherwise
         """
         self.src_mac = src_mac
         self.dst_mac = dst_mac
+        self.src_mac_raw = src_mac_raw
+        self.dst_mac_raw = dst_mac_raw
         self.data = data
-        self.checksum = utils.calculate_checksum(data)
+        self.checksum = utils.calculate_checksum_int(data) if checksum is None else checksum
+    
+    def header_bytes(self) -> bytes:
+        """Get just the frame header, so it can be sent ahead of the payload without copying it."""
+        src_mac_raw = self.src_mac_raw
+        if src_mac_raw is None:
+            src_mac_raw = utils.mac_to_bytes(self.src_mac)
+        dst_mac_raw = self.dst_mac_raw
+        if dst_mac_raw is None:
+            dst_mac_raw = utils.mac_to_bytes(self.dst_mac)
+        
+        return _FRAME_HDR.pack(
+            src_mac_raw,
+            dst_mac_raw,
+            sum(map(len, _as_parts(self.data))),
+            self.checksum
+        )
     
     def to_bytes(self) -> bytes:
         """Convert the frame to bytes for transmission."""
-        # Format: src_mac|dst_mac|checksum_length|checksum|data_length|data
-        frame_dict = {
-            'src_mac': self.src_mac,
-            'dst_mac': self.dst_mac,
-            'checksum': self.checksum.hex(),
-            'data': self.data.hex()
-        }
-        return utils.serialize_dict(frame_dict)
+        # Format: fixed binary header followed by the raw payload
+        return b''.join([self.header_bytes()] + _as_parts(self.data))
     
     @classmethod
     def from_bytes(cls, frame_bytes: bytes) -> 'Frame':
         """Create a frame from bytes received from the physical layer."""
-        frame_dict = utils.deserialize_dict(frame_bytes)
-        src_mac = frame_dict['src_mac']
-        dst_mac = frame_dict['dst_mac']
-        checksum = bytes.fromhex(frame_dict['checksum'])
-        data = bytes.fromhex(frame_dict['data'])
+        src_raw, dst_raw, data_length, checksum = _FRAME_HDR.unpack_from(frame_bytes, 0)
         
-        frame = cls(src_mac, dst_mac, data)
-        frame.checksum = checksum
-        return frame
+        # Take the payload as a view into the received buffer rather than a copy
+        start = _FRAME_HDR.size
+        data = memoryview(frame_bytes)[start:start + data_length]
+        
+        # The checksum comes from the header; is_valid() is what recomputes it
+        return cls(
+            utils.bytes_to_mac(src_raw),
+            utils.bytes_to_mac(dst_raw),
+            data,
+            src_raw,
+            dst_raw,
+            checksum
+        )
     
     def is_valid(self) -> bool:
         """Check if the frame's checksum is valid."""
-        return utils.verify_checksum(self.data, self.checksum)
+        # The checksum is kept as an int, so compare it directly in the one CRC pass
+        return utils.calculate_checksum_int(self.data) == self.checksum
 
 
 class DataLinkLayer(OSILayer):
@@ -77,40 +113,89 @@ class DataLinkLayer(OSILayer):
         """
         super().__init__("Data Link")
         self.mac_address = mac_address or utils.get_system_mac_address()
-        # In a real implementation, we would have an ARP table to map IP to MAC
         self.destination_mac = None
+        # ARP table mapping the IP addresses of known hosts to their MAC addresses
+        self.arp_table: Dict[str, str] = {}
+        # Packed forms of MAC addresses seen so far, so frames don't reparse them on every send
+        self._mac_raw = utils.mac_to_bytes(self.mac_address)
+        self._packed_macs: Dict[str, bytes] = {self.mac_address: self._mac_raw}
     
     def set_destination_mac(self, mac_address: str) -> None:
         """Set the destination MAC address."""
         self.destination_mac = mac_address
+        self._pack_mac(mac_address)
+    
+    def add_arp_entry(self, ip_address: str, mac_address: str) -> None:
+        """
+        Record the MAC address a host's IP address resolves to.
+        
+        Args:
+            ip_address: The IP address of the host
+            mac_address: The MAC address frames for that host should be sent to
+        """
+        if self.arp_table.get(ip_address) != mac_address:
+            self.arp_table[ip_address] = mac_address
+            self._pack_mac(mac_address)
+    
+    def _pack_mac(self, mac_address: str) -> bytes:
+        """Get the packed form of a MAC address, packing it only the first time it is seen."""
+        packed = self._packed_macs.get(mac_address)
+        if packed is None:
+            packed = self._packed_macs[mac_address] = utils.mac_to_bytes(mac_address)
+        return packed
     
     def send_down(self, data: bytes, **kwargs) -> None:
         """
         Process data from the Network layer and send it down to the Physical layer.
         
         Args:
-            data: The data to be framed and sent
-            **kwargs: Additional parameters, may include destination MAC
+            data: The data to be framed and sent, as one buffer or a list of buffers
+            **kwargs: Additional parameters, may include destination MAC, destination IP,
+                or the payload's checksum when the caller already has it (e.g. a resend)
+        """
+        self.send_down_batch([data], **kwargs)
+    
+    def send_down_batch(self, items: List[Union[bytes, List[bytes]]], **kwargs) -> None:
+        """
+        Frame several payloads for the same destination and send them down together.
+        
+        The destination MAC address is resolved once for the whole batch.
+        
+        Args:
+            items: The payloads to be framed and sent, each as one buffer or a list of buffers
+            **kwargs: Additional parameters, as for send_down(); a checksum is only
+                used when the batch holds a single payload
         """
-        dst_mac = kwargs.get('dst_mac', self.destination_mac)
+        dst_mac = kwargs.get('dst_mac')
+        if not dst_mac:
+            # Resolve the destination IP through the ARP table before falling back
+            dst_mac = self.arp_table.get(kwargs.get('dst_ip')) or self.destination_mac
         if not dst_mac:
             # Use the broadcast MAC address as default
             dst_mac = "ff:ff:ff:ff:ff:ff"  # Broadcast address
-            print(f"[{self.name}] No destination MAC provided, using broadcast: {dst_mac}")
+            logger.debug("[%s] No destination MAC provided, using broadcast: %s", self.name, dst_mac)
             # Store this MAC for future use
-            self.destination_mac = dst_mac
-        
-        print(f"[{self.name}] Creating frame: {self.mac_address} -> {dst_mac}")
+            self.set_destination_mac(dst_mac)
         
-        # Create a frame with the data
-        frame = Frame(self.mac_address, dst_mac, data)
-        frame_bytes = frame.to_bytes()
+        dst_mac_raw = self._pack_mac(dst_mac)
+        checksum = kwargs.get('checksum') if len(items) == 1 else None
         
-        print(f"[{self.name}] Frame created, size: {len(frame_bytes)} bytes")
+        frames = []
+        for data in items:
+            logger.debug("[%s] Creating frame: %s -> %s", self.name, self.mac_address, dst_mac)
+            
+            # Create a frame with the data, reusing the packed addresses
+            frame = Frame(self.mac_address, dst_mac, data, self._mac_raw, dst_mac_raw, checksum)
+            
+            # Send the header and payload buffers as they are, without joining them
+            frame_parts = [frame.header_bytes()] + _as_parts(data)
+            frames.append(frame_parts)
+            
+            logger.debug("[%s] Frame created, size: %s bytes", self.name, sum(map(len, frame_parts)))
         
-        # Send the frame down to the Physical layer
+        # Send the frames down to the Physical layer
         if self.lower_layer:
-            self.lower_layer.send_down(frame_bytes)
+            self.lower_layer.send_down_batch(frames)
     
     def send_up(self, data: bytes, **kwargs) -> None:
         """
@@ -120,28 +205,28 @@ class DataLinkLayer(OSILayer):
             data: The framed data received from the Physical layer
             **kwargs: Additional parameters
         """
-        print(f"[{self.name}] Received frame, size: {len(data)} bytes")
+        logger.debug("[%s] Received frame, size: %s bytes", self.name, len(data))
         
         # Parse the frame
         try:
             frame = Frame.from_bytes(data)
             
-            print(f"[{self.name}] Frame: {frame.src_mac} -> {frame.dst_mac}")
+            logger.debug("[%s] Frame: %s -> %s", self.name, frame.src_mac, frame.dst_mac)
             
             # Check if the frame is valid
             if not frame.is_valid():
-                print(f"[{self.name}] Invalid frame checksum, discarding")
+                logger.warning("[%s] Invalid frame checksum, discarding", self.name)
                 return
             
             # Check if the frame is addressed to us or is a broadcast
             # For simulation purposes, we'll accept all frames to ensure communication works
             # In a real implementation, we would strictly check the MAC address
             if frame.dst_mac != self.mac_address and frame.dst_mac != "ff:ff:ff:ff:ff:ff":
-                print(f"[{self.name}] Frame not addressed to us ({self.mac_address}), but accepting for simulation")
+                logger.debug("[%s] Frame not addressed to us (%s), but accepting for simulation", self.name, self.mac_address)
                 # Store the source MAC for future responses
                 if not self.destination_mac:
-                    self.destination_mac = frame.src_mac
-                    print(f"[{self.name}] Setting destination MAC to {self.destination_mac}")
+                    self.set_destination_mac(frame.src_mac)
+                    logger.debug("[%s] Setting destination MAC to %s", self.name, self.destination_mac)
                 
                 # Send the data up to the Network layer
                 if self.upper_layer:
@@ -150,13 +235,13 @@ class DataLinkLayer(OSILayer):
             
             # Store the source MAC for future responses
             if not self.destination_mac:
-                self.destination_mac = frame.src_mac
-                print(f"[{self.name}] Setting destination MAC to {self.destination_mac}")
+                self.set_destination_mac(frame.src_mac)
+                logger.debug("[%s] Setting destination MAC to %s", self.name, self.destination_mac)
             
             # Send the data up to the Network layer
             if self.upper_layer:
                 self.upper_layer.send_up(data=frame.data, src_mac=frame.src_mac)
         
         except Exception as e:
-            print(f"[{self.name}] Error processing frame: {e}")
+            logger.error("[%s] Error processing frame: %s", self.name, e)
             return 
\ No newline at end of file
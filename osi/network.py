@@ -6,11 +6,21 @@ It handles logical addressing (IP) and determines the path for data to travel.
 """
 from typing import Any, Dict, Optional, Tuple, List
 import struct
+import logging
 
 from osi import OSILayer
 import utils
 
 
+logger = logging.getLogger(__name__)
+
+# Packet header: src IP, dst IP, TTL, protocol, payload length
+_PKT_HDR = struct.Struct('!4s4sBBI')
+
+# Most destination IPs RoutingTable remembers a route for
+_ROUTE_CACHE_SIZE = 1024
+
+
 class Packet:
     """
     A network layer packet.
@@ -18,7 +28,8 @@ class Packet:
     Contains source and destination IP addresses, TTL, protocol, and payload data.
     """
     
-    def __init__(self, src_ip: str, dst_ip: str, data: bytes, ttl: int = 64, protocol: int = 6):
+    def __init__(self, src_ip: str, dst_ip: str, data: bytes, ttl: int = 64, protocol: int = 6,
+                 src_ip_raw: Optional[bytes] = None, dst_ip_raw: Optional[bytes] = None):
         """
         Initialize a packet with source and destination IP addresses and data.
         
@@ -28,35 +39,50 @@ class Packet:
             data: Payload data
             ttl: Time to live
             protocol: Protocol number (6 for TCP, 17 for UDP)
+            src_ip_raw: The source IP already packed to 4 bytes, if the caller has it
+            dst_ip_raw: The destination IP already packed to 4 bytes, if the caller has it
         """
         self.src_ip = src_ip
         self.dst_ip = dst_ip
+        self.src_ip_raw = src_ip_raw
+        self.dst_ip_raw = dst_ip_raw
         self.ttl = ttl
         self.protocol = protocol
         self.data = data
     
+    def header_bytes(self) -> bytes:
+        """Get just the packet header, so it can be sent ahead of the payload without copying it."""
+        src_ip_raw = self.src_ip_raw
+        if src_ip_raw is None:
+            src_ip_raw = utils.ip_to_bytes(self.src_ip)
+        dst_ip_raw = self.dst_ip_raw
+        if dst_ip_raw is None:
+            dst_ip_raw = utils.ip_to_bytes(self.dst_ip)
+        
+        return _PKT_HDR.pack(
+            src_ip_raw,
+            dst_ip_raw,
+            self.ttl,
+            self.protocol,
+            len(self.data)
+        )
+    
     def to_bytes(self) -> bytes:
         """Convert the packet to bytes for transmission."""
-        packet_dict = {
-            'src_ip': self.src_ip,
-            'dst_ip': self.dst_ip,
-            'ttl': self.ttl,
-            'protocol': self.protocol,
-            'data': self.data.hex()
-        }
-        return utils.serialize_dict(packet_dict)
+        # Format: fixed binary header followed by the raw payload
+        return b''.join((self.header_bytes(), self.data))
     
     @classmethod
     def from_bytes(cls, packet_bytes: bytes) -> 'Packet':
         """Create a packet from bytes received from the Data Link layer."""
-        packet_dict = utils.deserialize_dict(packet_bytes)
-        src_ip = packet_dict['src_ip']
-        dst_ip = packet_dict['dst_ip']
-        ttl = packet_dict['ttl']
-        protocol = packet_dict['protocol']
-        data = bytes.fromhex(packet_dict['data'])
-        
-        return cls(src_ip, dst_ip, data, ttl, protocol)
+        src_raw, dst_raw, ttl, protocol, data_length = _PKT_HDR.unpack_from(packet_bytes, 0)
+        
+        # Take the payload as a view into the received buffer rather than a copy
+        start = _PKT_HDR.size
+        data = memoryview(packet_bytes)[start:start + data_length]
+        
+        return cls(utils.bytes_to_ip(src_raw), utils.bytes_to_ip(dst_raw), data, ttl, protocol,
+                   src_raw, dst_raw)
 
 
 class RoutingTable:
@@ -65,6 +91,11 @@ class RoutingTable:
     def __init__(self):
         """Initialize an empty routing table."""
         self.routes = []
+        # (network, netmask, route) with the addresses as integers, longest prefix first
+        self._prefixes: List[Tuple[int, int, Dict]] = []
+        # Routes already chosen for destination IPs, oldest first; cleared whenever
+        # the routes change and capped at _ROUTE_CACHE_SIZE entries
+        self._route_cache: Dict[str, Dict] = {}
     
     def add_route(self, network: str, netmask: str, gateway: str, interface: str) -> None:
         """
@@ -76,12 +107,20 @@ class RoutingTable:
             gateway: Gateway IP address
             interface: Network interface
         """
-        self.routes.append({
+        route = {
             'network': network,
             'netmask': netmask,
             'gateway': gateway,
             'interface': interface
-        })
+        }
+        self.routes.append(route)
+        
+        # Parse the addresses once here so lookups only need integer arithmetic
+        mask_int = int.from_bytes(utils.ip_to_bytes(netmask), 'big')
+        net_int = int.from_bytes(utils.ip_to_bytes(network), 'big') & mask_int
+        self._prefixes.append((net_int, mask_int, route))
+        self._prefixes.sort(key=lambda prefix: bin(prefix[1]).count('1'), reverse=True)
+        self._route_cache.clear()
     
     def get_route(self, dst_ip: str) -> Optional[Dict]:
         """
@@ -93,10 +132,20 @@ class RoutingTable:
         Returns:
             The route if found, None otherwise
         """
-        # In a real implementation, we would check if the destination IP
-        # matches any of our routes based on the network and netmask
-        # For simplicity, we'll just return the first route
-        return self.routes[0] if self.routes else None
+        route = self._route_cache.get(dst_ip)
+        if route is not None:
+            return route
+        
+        # Longest-prefix match: prefixes are sorted longest first, so the first hit wins
+        dst_int = int.from_bytes(utils.ip_to_bytes(dst_ip), 'big')
+        for net_int, mask_int, candidate in self._prefixes:
+            if dst_int & mask_int == net_int:
+                if len(self._route_cache) >= _ROUTE_CACHE_SIZE:
+                    # Forget the oldest destination to make room
+                    del self._route_cache[next(iter(self._route_cache))]
+                self._route_cache[dst_ip] = candidate
+                return candidate
+        return None
 
 
 class NetworkLayer(OSILayer):
@@ -122,10 +171,21 @@ class NetworkLayer(OSILayer):
         
         # In a real implementation, we would have an ARP table to map IP to MAC
         self.destination_ip = None
+        # Packed forms of addresses seen so far, so packets don't reparse them on every send
+        self._ip_raw = utils.ip_to_bytes(self.ip_address)
+        self._packed_ips: Dict[str, bytes] = {self.ip_address: self._ip_raw}
     
     def set_destination_ip(self, ip_address: str) -> None:
         """Set the destination IP address."""
         self.destination_ip = ip_address
+        self._pack_ip(ip_address)
+    
+    def _pack_ip(self, ip_address: str) -> bytes:
+        """Get the packed form of an IP address, packing it only the first time it is seen."""
+        packed = self._packed_ips.get(ip_address)
+        if packed is None:
+            packed = self._packed_ips[ip_address] = utils.ip_to_bytes(ip_address)
+        return packed
     
     def send_down(self, data: bytes, **kwargs) -> None:
         """
@@ -135,36 +195,53 @@ class NetworkLayer(OSILayer):
             data: The data to be packaged and sent
             **kwargs: Additional parameters, may include destination IP
         """
+        self.send_down_batch([data], **kwargs)
+    
+    def send_down_batch(self, items: List[bytes], **kwargs) -> None:
+        """
+        Package several payloads for the same destination and send them down together.
+        
+        The destination and route are resolved once for the whole batch.
+        
+        Args:
+            items: The payloads to be packaged and sent, in order
+            **kwargs: Additional parameters, may include destination IP
+        """
         dst_ip = kwargs.get('dst_ip', self.destination_ip)
         if not dst_ip:
             # Use a default IP address instead of generating a random one
             dst_ip = "127.0.0.1"  # Default to localhost
-            print(f"[{self.name}] No destination IP provided, using default: {dst_ip}")
-            self.destination_ip = dst_ip
+            logger.debug("[%s] No destination IP provided, using default: %s", self.name, dst_ip)
+            self.set_destination_ip(dst_ip)
         
         protocol = kwargs.get('protocol', 6)  # Default to TCP
+        dst_ip_raw = self._pack_ip(dst_ip)
         
-        print(f"[{self.name}] Creating packet: {self.ip_address} -> {dst_ip}")
-        
-        # Create a packet with the data
-        packet = Packet(self.ip_address, dst_ip, data, protocol=protocol)
-        packet_bytes = packet.to_bytes()
-        
-        print(f"[{self.name}] Packet created, size: {len(packet_bytes)} bytes")
+        packets = []
+        for data in items:
+            logger.debug("[%s] Creating packet: %s -> %s", self.name, self.ip_address, dst_ip)
+            
+            # Create a packet with the data
+            packet = Packet(self.ip_address, dst_ip, data, protocol=protocol,
+                            src_ip_raw=self._ip_raw, dst_ip_raw=dst_ip_raw)
+            packets.append([packet.header_bytes(), data])
+            
+            logger.debug("[%s] Packet created, size: %s bytes", self.name, _PKT_HDR.size + len(data))
         
         # Get the route for the destination IP
         route = self.routing_table.get_route(dst_ip)
         if not route:
-            print(f"[{self.name}] No route to {dst_ip}, discarding")
+            logger.warning("[%s] No route to %s, discarding", self.name, dst_ip)
             return
         
         # In a real implementation, we would use ARP to resolve the MAC address
         # of the next hop (gateway or destination)
         # For simplicity, we'll just pass the packet down to the Data Link layer
         
-        # Send the packet down to the Data Link layer
+        # Send the packets down to the Data Link layer
         if self.lower_layer:
-            self.lower_layer.send_down(packet_bytes)
+            # The header and payload go down as separate buffers, so the payload is never copied
+            self.lower_layer.send_down_batch(packets, dst_ip=dst_ip)
     
     def send_up(self, data: bytes, **kwargs) -> None:
         """
@@ -172,25 +249,30 @@ class NetworkLayer(OSILayer):
         
         Args:
             data: The packaged data received from the Data Link layer
-            **kwargs: Additional parameters
+            **kwargs: Additional parameters, may include the source MAC
         """
-        print(f"[{self.name}] Received packet, size: {len(data)} bytes")
+        logger.debug("[%s] Received packet, size: %s bytes", self.name, len(data))
         
         # Parse the packet
         try:
             packet = Packet.from_bytes(data)
             
-            print(f"[{self.name}] Packet: {packet.src_ip} -> {packet.dst_ip} (TTL: {packet.ttl}, Protocol: {packet.protocol})")
+            logger.debug("[%s] Packet: %s -> %s (TTL: %s, Protocol: %s)", self.name, packet.src_ip, packet.dst_ip, packet.ttl, packet.protocol)
+            
+            # Learn which MAC address the sender's IP resolves to
+            src_mac = kwargs.get('src_mac')
+            if src_mac and self.lower_layer:
+                self.lower_layer.add_arp_entry(packet.src_ip, src_mac)
             
             # Check if the packet is addressed to us
             # For simulation purposes, we'll accept all packets to ensure communication works
             # In a real implementation, we would strictly check the IP address
             if packet.dst_ip != self.ip_address:
-                print(f"[{self.name}] Packet not addressed to us ({self.ip_address}), but accepting for simulation")
+                logger.debug("[%s] Packet not addressed to us (%s), but accepting for simulation", self.name, self.ip_address)
                 # Store the source IP for future responses
                 if not self.destination_ip:
-                    self.destination_ip = packet.src_ip
-                    print(f"[{self.name}] Setting destination IP to {self.destination_ip}")
+                    self.set_destination_ip(packet.src_ip)
+                    logger.debug("[%s] Setting destination IP to %s", self.name, self.destination_ip)
                 
                 # Send the data up to the Transport layer
                 if self.upper_layer:
@@ -203,8 +285,8 @@ class NetworkLayer(OSILayer):
             
             # Store the source IP for future responses
             if not self.destination_ip:
-                self.destination_ip = packet.src_ip
-                print(f"[{self.name}] Setting destination IP to {self.destination_ip}")
+                self.set_destination_ip(packet.src_ip)
+                logger.debug("[%s] Setting destination IP to %s", self.name, self.destination_ip)
             
             # Send the data up to the Transport layer
             if self.upper_layer:
@@ -215,5 +297,5 @@ class NetworkLayer(OSILayer):
                 )
         
         except Exception as e:
-            print(f"[{self.name}] Error processing packet: {e}")
+            logger.error("[%s] Error processing packet: %s", self.name, e)
             return 
\ No newline at end of file
@@ -5,13 +5,61 @@ The Physical Layer is responsible for the transmission and reception of raw bit
 In this simulation, we use Python sockets to simulate the physical connection.
 """
 import socket
+import struct
+import threading
 import time
-from typing import Any, Dict, Optional, Tuple
+import logging
+from typing import Any, Dict, Optional, Tuple, List, Union
 
 from osi import OSILayer
 import utils
 
 
+logger = logging.getLogger(__name__)
+
+# Length prefix written before every frame on the socket
+_LENGTH_PREFIX = struct.Struct('!I')
+
+# Kernel receive buffer requested for the connection
+_RECV_BUFFER_SIZE = 1024 * 1024
+
+# Largest single read drain() asks the socket for
+_RECV_CHUNK_SIZE = 64 * 1024
+
+# Most buffers handed to a single sendmsg() call; stays under IOV_MAX (1024 on Linux)
+_SENDMSG_MAX_BUFFERS = 512
+
+# First and longest waits, in seconds, between client connection attempts
+_CONNECT_RETRY_DELAY = 0.05
+_CONNECT_RETRY_MAX_DELAY = 2.0
+
+
+def _send_all_parts(sock: socket.socket, parts: List[bytes]) -> None:
+    """
+    Send several buffers as one write, like sendall() on their concatenation.
+    
+    Args:
+        sock: The connected socket to write to
+        parts: The buffers to send, in order
+    """
+    if not hasattr(sock, 'sendmsg'):
+        # Windows has no sendmsg(); fall back to a write per part
+        for part in parts:
+            sock.sendall(part)
+        return
+    
+    views = [memoryview(part) for part in parts]
+    while views:
+        # sendmsg() takes at most IOV_MAX buffers per call
+        sent = sock.sendmsg(views[:_SENDMSG_MAX_BUFFERS])
+        # Drop whatever was fully written and trim a partially written buffer
+        while views and sent >= len(views[0]):
+            sent -= len(views[0])
+            views.pop(0)
+        if sent:
+            views[0] = views[0][sent:]
+
+
 class PhysicalLayer(OSILayer):
     """
     Physical Layer implementation.
@@ -35,6 +83,11 @@ class PhysicalLayer(OSILayer):
         self.socket = None
         self.client_socket = None
         self.client_address = None
+        self.connected = False
+        # Serializes writes so frames sent from different threads never interleave
+        self._send_lock = threading.Lock()
+        # Bytes read by drain() that do not yet form a complete frame
+        self._recv_buffer = bytearray()
         
     def initialize(self) -> None:
         """Initialize the socket connection based on whether this is a server or client."""
@@ -42,39 +95,72 @@ class PhysicalLayer(OSILayer):
             self._initialize_server()
         else:
             self._initialize_client()
+        self.set_nodelay()
+    
+    def set_nodelay(self) -> None:
+        """
+        Disable Nagle's algorithm on the connected socket.
+        
+        Frames are written whole, so there is nothing to gain from the kernel holding
+        small frames back while it waits for more data.
+        """
+        sock = self.client_socket if self.is_server else self.socket
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
     
     def _initialize_server(self) -> None:
         """Initialize the server socket and wait for a connection."""
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Set before listen() so accepted connections inherit it and can scale their window
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _RECV_BUFFER_SIZE)
         self.socket.bind((self.host, self.port))
         self.socket.listen(1)
-        print(f"[{self.name}] Server listening on {self.host}:{self.port}")
+        logger.info("[%s] Server listening on %s:%s", self.name, self.host, self.port)
         
         # Accept a connection
         self.client_socket, self.client_address = self.socket.accept()
-        print(f"[{self.name}] Connection established with {self.client_address}")
+        logger.info("[%s] Connection established with %s", self.name, self.client_address)
+        self.connected = True
     
     def _initialize_client(self) -> None:
         """Initialize the client socket and connect to the server."""
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        print(f"[{self.name}] Connecting to {self.host}:{self.port}")
+        # Set before connect() so the receive window can scale to it
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _RECV_BUFFER_SIZE)
+        logger.info("[%s] Connecting to %s:%s", self.name, self.host, self.port)
         
-        # Try to connect with retries
-        max_retries = 5
+        # Try to connect with retries, backing off exponentially so a server that is
+        # almost ready is picked up quickly while one that is slow still gets ~9 seconds
+        max_retries = 10
+        delay = _CONNECT_RETRY_DELAY
         for i in range(max_retries):
             try:
                 self.socket.connect((self.host, self.port))
-                print(f"[{self.name}] Connected to {self.host}:{self.port}")
+                logger.info("[%s] Connected to %s:%s", self.name, self.host, self.port)
+                self.connected = True
                 break
             except ConnectionRefusedError:
                 if i < max_retries - 1:
-                    print(f"[{self.name}] Connection failed, retrying in 2 seconds...")
-                    time.sleep(2)
+                    logger.warning("[%s] Connection failed, retrying in %.2f seconds...", self.name, delay)
+                    time.sleep(delay)
+                    delay = min(delay * 2, _CONNECT_RETRY_MAX_DELAY)
                 else:
                     raise
     
-    def send_down(self, data: bytes, **kwargs) -> None:
+    def fileno(self) -> int:
+        """
+        Get the file descriptor of the connected socket.
+        
+        This allows the layer to be registered with a selector so callers can
+        block until data arrives instead of polling.
+        
+        Returns:
+            The file descriptor of the socket data is received on
+        """
+        recv_socket = self.client_socket if self.is_server else self.socket
+        return recv_socket.fileno()
+    
+    def send_down(self, data: Union[bytes, List[bytes]], **kwargs) -> None:
         """
         Send data down to the physical medium (socket).
         
@@ -82,24 +168,40 @@ class PhysicalLayer(OSILayer):
         over a physical medium like copper wire, fiber optic, or radio waves.
         
         Args:
-            data: The bit stream to transmit
+            data: The bit stream to transmit, as one buffer or a list of buffers sent back to back
             **kwargs: Additional parameters
         """
-        print(f"[{self.name}] Sending {len(data)} bytes")
-        
-        # Convert data to a bit string for demonstration
-        bit_string = utils.bytes_to_bits(data)
-        print(f"[{self.name}] Bit representation (first 64 bits): {bit_string[:64]}...")
+        self.send_down_batch([data], **kwargs)
+    
+    def send_down_batch(self, items: List[Union[bytes, List[bytes]]], **kwargs) -> None:
+        """
+        Send several frames to the physical medium (socket) in one write.
         
-        # Prepare the data with a length prefix for framing
-        length_prefix = len(data).to_bytes(4, byteorder='big')
-        framed_data = length_prefix + data
+        Args:
+            items: The frames to transmit, each as one buffer or a list of buffers
+            **kwargs: Additional parameters
+        """
+        send_parts = []
+        for data in items:
+            parts = data if isinstance(data, list) else [data]
+            data_length = sum(map(len, parts))
+            logger.debug("[%s] Sending %s bytes", self.name, data_length)
+            
+            # Convert data to a bit string for demonstration; only the bits shown are converted
+            if logger.isEnabledFor(logging.DEBUG):
+                bit_string = utils.bytes_to_bits(b''.join(part[:8] for part in parts)[:8])
+                logger.debug("[%s] Bit representation (first 64 bits): %s...", self.name, bit_string)
+            
+            # Prepare the data with a length prefix for framing
+            send_parts.append(_LENGTH_PREFIX.pack(data_length))
+            send_parts.extend(parts)
         
-        # Send the data over the socket
-        if self.is_server:
-            self.client_socket.sendall(framed_data)
-        else:
-            self.socket.sendall(framed_data)
+        # Send every prefix and data buffer together without copying them into one
+        with self._send_lock:
+            if self.is_server:
+                _send_all_parts(self.client_socket, send_parts)
+            else:
+                _send_all_parts(self.socket, send_parts)
     
     def send_up(self, **kwargs) -> None:
         """
@@ -114,35 +216,107 @@ class PhysicalLayer(OSILayer):
         # Determine which socket to use
         recv_socket = self.client_socket if self.is_server else self.socket
         
-        # First receive the length prefix (4 bytes)
-        length_bytes = recv_socket.recv(4)
-        if not length_bytes:
-            print(f"[{self.name}] Connection closed")
+        # Anything drain() left over has to be consumed before reading the socket
+        buffered = self._recv_buffer
+        self._recv_buffer = bytearray()
+        
+        # First receive the length prefix, which may arrive in pieces
+        prefix_size = _LENGTH_PREFIX.size
+        while len(buffered) < prefix_size:
+            chunk = recv_socket.recv(prefix_size - len(buffered))
+            if not chunk:
+                break
+            buffered += chunk
+        
+        if len(buffered) < prefix_size:
+            logger.info("[%s] Connection closed", self.name)
+            self.connected = False
             return
         
         # Convert length prefix to integer
-        data_length = int.from_bytes(length_bytes, byteorder='big')
+        data_length, = _LENGTH_PREFIX.unpack_from(buffered)
+        data = buffered[prefix_size:]
         
-        # Receive the actual data
-        data = b''
-        remaining = data_length
-        while remaining > 0:
-            chunk = recv_socket.recv(min(4096, remaining))
-            if not chunk:
+        # Receive the payload straight into a buffer sized from the length prefix
+        buffer = bytearray(data_length)
+        view = memoryview(buffer)
+        received = len(data)
+        view[:received] = data
+        while received < data_length:
+            count = recv_socket.recv_into(view[received:], data_length - received)
+            if not count:
                 break
-            data += chunk
-            remaining -= len(chunk)
+            received += count
+        data = buffer if received == data_length else buffer[:received]
         
-        print(f"[{self.name}] Received {len(data)} bytes")
+        logger.debug("[%s] Received %s bytes", self.name, len(data))
         
-        # Convert data to a bit string for demonstration
-        bit_string = utils.bytes_to_bits(data)
-        print(f"[{self.name}] Bit representation (first 64 bits): {bit_string[:64]}...")
+        # Convert data to a bit string for demonstration; only the bits shown are converted
+        if logger.isEnabledFor(logging.DEBUG):
+            bit_string = utils.bytes_to_bits(data[:8])
+            logger.debug("[%s] Bit representation (first 64 bits): %s...", self.name, bit_string)
         
         # Send the data up to the Data Link layer
         if self.upper_layer:
             self.upper_layer.send_up(data=data)
     
+    def drain(self) -> int:
+        """
+        Receive every frame currently queued on the socket and send each up the stack.
+        
+        The socket is read without blocking until it reports no more data, so a
+        single wakeup handles a whole burst of frames instead of just the first one.
+        A trailing partial frame is kept until the rest of it arrives.
+        
+        Returns:
+            The number of frames sent up to the Data Link layer
+        """
+        recv_socket = self.client_socket if self.is_server else self.socket
+        buffer = self._recv_buffer
+        
+        # Only the reads are non-blocking; frames are dispatched (and any replies
+        # sent) after the socket is back in blocking mode
+        recv_socket.setblocking(False)
+        try:
+            while True:
+                try:
+                    chunk = recv_socket.recv(_RECV_CHUNK_SIZE)
+                except (BlockingIOError, InterruptedError):
+                    break
+                if not chunk:
+                    logger.info("[%s] Connection closed", self.name)
+                    self.connected = False
+                    break
+                buffer += chunk
+        finally:
+            recv_socket.setblocking(True)
+        
+        # Split the buffer into complete length-prefixed frames
+        frames = []
+        offset = 0
+        prefix_size = _LENGTH_PREFIX.size
+        while len(buffer) - offset >= prefix_size:
+            data_length, = _LENGTH_PREFIX.unpack_from(buffer, offset)
+            end = offset + prefix_size + data_length
+            if end > len(buffer):
+                break
+            frames.append(bytes(buffer[offset + prefix_size:end]))
+            offset = end
+        del buffer[:offset]
+        
+        for data in frames:
+            logger.debug("[%s] Received %s bytes", self.name, len(data))
+            
+            # Convert data to a bit string for demonstration; only the bits shown are converted
+            if logger.isEnabledFor(logging.DEBUG):
+                bit_string = utils.bytes_to_bits(data[:8])
+                logger.debug("[%s] Bit representation (first 64 bits): %s...", self.name, bit_string)
+            
+            if self.upper_layer:
+                self.upper_layer.send_up(data=data)
+        
+        return len(frames)
+    
     def close(self) -> None:
         """Close the socket connection."""
         if self.is_server:
@@ -153,4 +327,5 @@ class PhysicalLayer(OSILayer):
         else:
             if self.socket:
                 self.socket.close()
-        print(f"[{self.name}] Connection closed") 
\ No newline at end of file
+        self.connected = False
+        logger.info("[%s] Connection closed", self.name) 
\ No newline at end of file
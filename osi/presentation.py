@@ -5,13 +5,20 @@ The Presentation Layer is responsible for data translation, encryption, and comp
 It ensures that data from the application layer is properly formatted for transmission.
 """
 from typing import Any, Dict, Optional, Tuple, List
-import json
-import base64
+import struct
+import logging
 
 from osi import OSILayer
 import utils
 
 
+logger = logging.getLogger(__name__)
+
+# Message header: data format, encryption, compression, whether a key is present, the key,
+# payload length; followed by the raw payload
+_MESSAGE_HDR = struct.Struct('>BBB?qI')
+
+
 class PresentationMessage:
     """
     A presentation layer message.
@@ -32,6 +39,8 @@ class PresentationMessage:
     NO_COMPRESSION = 0
     SIMPLE_COMPRESSION = 1
     
+    __slots__ = ('data', 'data_format', 'encryption', 'compression', 'encryption_key')
+    
     def __init__(
         self,
         data: bytes,
@@ -56,31 +65,43 @@ class PresentationMessage:
         self.compression = compression
         self.encryption_key = encryption_key
     
+    def header_bytes(self) -> bytes:
+        """Get just the message header, so it can be sent ahead of the payload without copying it."""
+        has_key = self.encryption_key is not None
+        return _MESSAGE_HDR.pack(
+            self.data_format,
+            self.encryption,
+            self.compression,
+            has_key,
+            self.encryption_key if has_key else 0,
+            len(self.data)
+        )
+    
     def to_bytes(self) -> bytes:
         """Convert the message to bytes for transmission."""
-        message_dict = {
-            'data_format': self.data_format,
-            'encryption': self.encryption,
-            'compression': self.compression,
-            'data': self.data.hex()
-        }
-        
-        if self.encryption_key is not None:
-            message_dict['encryption_key'] = self.encryption_key
-        
-        return utils.serialize_dict(message_dict)
+        return b''.join((self.header_bytes(), self.data))
     
     @classmethod
     def from_bytes(cls, message_bytes: bytes) -> 'PresentationMessage':
         """Create a message from bytes received from the Session layer."""
-        message_dict = utils.deserialize_dict(message_bytes)
-        data_format = message_dict['data_format']
-        encryption = message_dict['encryption']
-        compression = message_dict['compression']
-        data = bytes.fromhex(message_dict['data'])
-        encryption_key = message_dict.get('encryption_key')
-        
-        return cls(data, data_format, encryption, compression, encryption_key)
+        (data_format, encryption, compression,
+         has_key, encryption_key, data_length) = _MESSAGE_HDR.unpack_from(message_bytes, 0)
+        
+        # Slice the payload out as a view rather than a copy
+        data_start = _MESSAGE_HDR.size
+        data = memoryview(message_bytes)[data_start:data_start + data_length]
+        
+        return cls(
+            data,
+            data_format,
+            encryption,
+            compression,
+            encryption_key if has_key else None
+        )
+
+
+# Data formats for which format_data() passes bytes through unchanged
+_PASSTHROUGH_FORMATS = frozenset((PresentationMessage.TEXT, PresentationMessage.BINARY, PresentationMessage.JSON))
 
 
 class PresentationLayer(OSILayer):
@@ -103,8 +124,14 @@ class PresentationLayer(OSILayer):
         
         Args:
             encryption_type: The encryption type
-            key: The encryption key (if applicable)
+            key: The encryption key (if applicable), a byte value from 0 to 255
+            
+        Raises:
+            ValueError: If the key is not a byte value; the message header only
+                carries a single integer key
         """
+        if key is not None and not (isinstance(key, int) and 0 <= key <= 255):
+            raise ValueError(f"Encryption key must be an int from 0 to 255, got {key!r}")
         self.default_encryption = encryption_type
         if key is not None:
             self.encryption_key = key
@@ -137,7 +164,7 @@ class PresentationLayer(OSILayer):
             return utils.simple_encrypt(data, key or self.encryption_key)
         
         # Unsupported encryption type
-        print(f"[{self.name}] Unsupported encryption type: {encryption_type}")
+        logger.warning("[%s] Unsupported encryption type: %s", self.name, encryption_type)
         return data
     
     def decrypt(self, data: bytes, encryption_type: int, key: Optional[int] = None) -> bytes:
@@ -159,7 +186,7 @@ class PresentationLayer(OSILayer):
             return utils.simple_decrypt(data, key or self.encryption_key)
         
         # Unsupported encryption type
-        print(f"[{self.name}] Unsupported encryption type: {encryption_type}")
+        logger.warning("[%s] Unsupported encryption type: %s", self.name, encryption_type)
         return data
     
     def compress(self, data: bytes, compression_type: int) -> bytes:
@@ -180,7 +207,7 @@ class PresentationLayer(OSILayer):
             return utils.compress(data)
         
         # Unsupported compression type
-        print(f"[{self.name}] Unsupported compression type: {compression_type}")
+        logger.warning("[%s] Unsupported compression type: %s", self.name, compression_type)
         return data
     
     def decompress(self, data: bytes, compression_type: int) -> bytes:
@@ -201,7 +228,7 @@ class PresentationLayer(OSILayer):
             return utils.decompress(data)
         
         # Unsupported compression type
-        print(f"[{self.name}] Unsupported compression type: {compression_type}")
+        logger.warning("[%s] Unsupported compression type: %s", self.name, compression_type)
         return data
     
     def format_data(self, data: Any, data_format: int) -> bytes:
@@ -232,13 +259,16 @@ class PresentationLayer(OSILayer):
                 return str(data).encode('utf-8')
         
         elif data_format == PresentationMessage.JSON:
-            if isinstance(data, (dict, list, tuple)):
-                return json.dumps(data).encode('utf-8')
+            if isinstance(data, bytes):
+                # Already serialized by the caller
+                return data
+            elif isinstance(data, (dict, list, tuple)):
+                return utils.serialize_dict(data)
             else:
-                return json.dumps({"data": data}).encode('utf-8')
+                return utils.serialize_dict({"data": data})
         
         # Unsupported data format
-        print(f"[{self.name}] Unsupported data format: {data_format}")
+        logger.warning("[%s] Unsupported data format: %s", self.name, data_format)
         return str(data).encode('utf-8')
     
     def parse_data(self, data: bytes, data_format: int) -> Any:
@@ -252,64 +282,104 @@ class PresentationLayer(OSILayer):
         Returns:
             The parsed data
         """
+        # str(..., 'utf-8') decodes any buffer, including the memoryview from_bytes hands out
         if data_format == PresentationMessage.TEXT:
-            return data.decode('utf-8')
+            return str(data, 'utf-8')
         
         elif data_format == PresentationMessage.BINARY:
-            return data
+            return bytes(data)
         
         elif data_format == PresentationMessage.JSON:
-            return json.loads(data.decode('utf-8'))
+            return utils.deserialize_dict(data)
         
         # Unsupported data format
-        print(f"[{self.name}] Unsupported data format: {data_format}")
+        logger.warning("[%s] Unsupported data format: %s", self.name, data_format)
         return data
     
-    def send_down(self, data: Any, **kwargs) -> None:
+    def _prepare_message(self, data: Any, **kwargs) -> PresentationMessage:
         """
-        Process data from the Application layer and send it down to the Session layer.
+        Format, encrypt and compress data into a message for the Session layer.
         
         Args:
-            data: The data to be formatted, encrypted, compressed, and sent
-            **kwargs: Additional parameters
+            data: The data to be formatted, encrypted and compressed
+            **kwargs: The data format, encryption, compression and key, if not the defaults
+            
+        Returns:
+            The presentation message
         """
         data_format = kwargs.get('data_format', PresentationMessage.TEXT)
         encryption = kwargs.get('encryption', self.default_encryption)
         compression = kwargs.get('compression', self.default_compression)
         encryption_key = kwargs.get('encryption_key', self.encryption_key)
-        session_id = kwargs.get('session_id')
-        remote_ip = kwargs.get('remote_ip')
-        remote_port = kwargs.get('remote_port')
         
-        print(f"[{self.name}] Processing data for transmission")
-        
-        # Format the data
-        formatted_data = self.format_data(data, data_format)
-        
-        # Encrypt the data
-        encrypted_data = self.encrypt(formatted_data, encryption, encryption_key)
-        
-        # Compress the data
-        compressed_data = self.compress(encrypted_data, compression)
+        logger.debug("[%s] Processing data for transmission", self.name)
+        
+        if (encryption == PresentationMessage.NONE
+                and compression == PresentationMessage.NO_COMPRESSION
+                and isinstance(data, bytes)
+                and data_format in _PASSTHROUGH_FORMATS):
+            # Nothing to format, encrypt or compress: the bytes go out as they are
+            compressed_data = data
+        else:
+            # Format the data
+            formatted_data = self.format_data(data, data_format)
+            
+            # Encrypt the data
+            encrypted_data = self.encrypt(formatted_data, encryption, encryption_key)
+            
+            # Compress the data
+            compressed_data = self.compress(encrypted_data, compression)
         
         # Create a presentation message
-        message = PresentationMessage(
+        return PresentationMessage(
             compressed_data,
             data_format,
             encryption,
             compression,
             encryption_key if encryption != PresentationMessage.NONE else None
         )
+    
+    def send_down(self, data: Any, **kwargs) -> None:
+        """
+        Process data from the Application layer and send it down to the Session layer.
+        
+        Args:
+            data: The data to be formatted, encrypted, compressed, and sent
+            **kwargs: Additional parameters
+        """
+        message = self._prepare_message(data, **kwargs)
         
-        # Send the message down to the Session layer
+        # Send the message down to the Session layer; the header and payload go as separate
+        # buffers so the payload is only copied once, when the session message is built
         if self.lower_layer:
             self.lower_layer.send_down(
-                message.to_bytes(),
-                session_id=session_id,
-                remote_ip=remote_ip,
-                remote_port=remote_port
+                [message.header_bytes(), message.data],
+                session_id=kwargs.get('session_id'),
+                remote_ip=kwargs.get('remote_ip'),
+                remote_port=kwargs.get('remote_port')
             )
     
+    def broadcast(self, data: Any, session_ids: Optional[List[str]] = None, **kwargs) -> int:
+        """
+        Send the same data to several sessions.
+        
+        The data is formatted, encrypted and compressed once, and the resulting
+        message is shared by every session.
+        
+        Args:
+            data: The data to be formatted, encrypted, compressed, and sent
+            session_ids: The sessions to send to. If None, every established session is used.
+            **kwargs: The data format, encryption, compression and key, if not the defaults
+            
+        Returns:
+            The number of sessions the data was sent over
+        """
+        if not self.lower_layer:
+            return 0
+        
+        message = self._prepare_message(data, **kwargs)
+        return self.lower_layer.broadcast([message.header_bytes(), message.data], session_ids)
+    
     def send_up(self, data: bytes, **kwargs) -> None:
         """
         Process data from the Session layer and send it up to the Application layer.
@@ -320,21 +390,26 @@ class PresentationLayer(OSILayer):
         """
         session_id = kwargs.get('session_id')
         
-        print(f"[{self.name}] Processing received data")
+        logger.debug("[%s] Processing received data", self.name)
         
         # Parse the message
         try:
             message = PresentationMessage.from_bytes(data)
             
-            # Decompress the data
-            decompressed_data = self.decompress(message.data, message.compression)
-            
-            # Decrypt the data
-            decrypted_data = self.decrypt(
-                decompressed_data,
-                message.encryption,
-                message.encryption_key
-            )
+            if (message.encryption == PresentationMessage.NONE
+                    and message.compression == PresentationMessage.NO_COMPRESSION):
+                # Nothing to decompress or decrypt
+                decrypted_data = message.data
+            else:
+                # Decompress the data
+                decompressed_data = self.decompress(message.data, message.compression)
+                
+                # Decrypt the data
+                decrypted_data = self.decrypt(
+                    decompressed_data,
+                    message.encryption,
+                    message.encryption_key
+                )
             
             # Parse the data
             parsed_data = self.parse_data(decrypted_data, message.data_format)
@@ -348,5 +423,5 @@ class PresentationLayer(OSILayer):
                 )
         
         except Exception as e:
-            print(f"[{self.name}] Error processing message: {e}")
+            logger.error("[%s] Error processing message: %s", self.name, e)
             return 
\ No newline at end of file
@@ -4,12 +4,35 @@ Session Layer Implementation.
 The Session Layer is responsible for establishing, managing, and terminating connections.
 It handles session setup, coordination, and synchronization between applications.
 """
-from typing import Any, Dict, Optional, Tuple, List, Set
+from typing import Any, Dict, Optional, Tuple, List, Set, Callable, Union
 import time
 import uuid
+import struct
+import logging
+from collections import OrderedDict
 
 from osi import OSILayer
-import utils
+
+
+logger = logging.getLogger(__name__)
+
+# Message header: type, timestamp, session ID length, payload length;
+# followed by the UTF-8 session ID and the raw payload
+_MESSAGE_HDR = struct.Struct('>BdHI')
+
+
+try:
+    _monotonic_ns = time.monotonic_ns
+except AttributeError:
+    # time.monotonic_ns() is new in Python 3.7
+    def _monotonic_ns() -> int:
+        """Get the monotonic clock in integer nanoseconds."""
+        return int(time.monotonic() * 1e9)
+
+
+def _as_parts(data: Union[bytes, List[bytes]]) -> List[bytes]:
+    """Get a payload as a list of buffers, whether it was given as one buffer or several."""
+    return data if isinstance(data, list) else [data]
 
 
 class Session:
@@ -33,9 +56,15 @@ class Session:
             session_id: The session ID. If None, a random one is generated.
         """
         self.session_id = session_id or str(uuid.uuid4())
+        # Encoded once, since every message sent over the session carries it
+        self.session_id_raw = self.session_id.encode('utf-8')
         self.state = self.CLOSED
-        self.creation_time = time.time()
-        self.last_activity_time = self.creation_time
+        # The peer's address, set when the session is established or accepted
+        self.remote_ip: Optional[str] = None
+        self.remote_port: Optional[int] = None
+        # Monotonic clock readings in nanoseconds; only converted to seconds when asked for
+        self.creation_ns = _monotonic_ns()
+        self.last_activity_ns = self.creation_ns
         self.data = {}  # Session data store
     
     def is_established(self) -> bool:
@@ -44,15 +73,25 @@ class Session:
     
     def update_activity(self) -> None:
         """Update the last activity time."""
-        self.last_activity_time = time.time()
+        self.last_activity_ns = _monotonic_ns()
+    
+    @property
+    def creation_time(self) -> float:
+        """Get the wall-clock time the session was created, in seconds since the epoch."""
+        return time.time() - self.get_duration()
+    
+    @property
+    def last_activity_time(self) -> float:
+        """Get the wall-clock time of the last activity, in seconds since the epoch."""
+        return time.time() - self.get_idle_time()
     
     def get_duration(self) -> float:
         """Get the session duration in seconds."""
-        return time.time() - self.creation_time
+        return (_monotonic_ns() - self.creation_ns) / 1e9
     
     def get_idle_time(self) -> float:
         """Get the idle time in seconds."""
-        return time.time() - self.last_activity_time
+        return (_monotonic_ns() - self.last_activity_ns) / 1e9
     
     def set_data(self, key: str, value: Any) -> None:
         """Set session data."""
@@ -78,65 +117,75 @@ class SessionMessage:
     DISCONNECT_ACK = 5
     KEEPALIVE = 6
     
-    def __init__(self, msg_type: int, session_id: str, data: bytes = b''):
+    __slots__ = ('msg_type', 'session_id', 'session_id_raw', 'data', '_timestamp')
+    
+    def __init__(self, msg_type: int, session_id: str, data: Union[bytes, List[bytes]] = b'',
+                 session_id_raw: Optional[bytes] = None):
         """
         Initialize a session message.
         
         Args:
             msg_type: The message type
             session_id: The session ID
-            data: The payload data
+            data: The payload data, as one buffer or a list of buffers sent back to back
+            session_id_raw: The session ID already encoded to UTF-8, if the caller has it
         """
         self.msg_type = msg_type
         self.session_id = session_id
+        self.session_id_raw = session_id_raw
         self.data = data
-        self.timestamp = time.time()
+        # Stamped the first time it is read, which for outgoing messages is in to_bytes()
+        self._timestamp: Optional[float] = None
+    
+    @property
+    def timestamp(self) -> float:
+        """Get the wall-clock time the message was sent, in seconds since the epoch."""
+        if self._timestamp is None:
+            self._timestamp = time.time()
+        return self._timestamp
     
     def to_bytes(self) -> bytes:
         """Convert the message to bytes for transmission."""
-        message_dict = {
-            'msg_type': self.msg_type,
-            'session_id': self.session_id,
-            'timestamp': self.timestamp,
-            'data': self.data.hex()
-        }
-        return utils.serialize_dict(message_dict)
+        session_id = self.session_id_raw
+        if session_id is None:
+            session_id = self.session_id.encode('utf-8')
+        parts = _as_parts(self.data)
+        header = _MESSAGE_HDR.pack(self.msg_type, self.timestamp, len(session_id), sum(map(len, parts)))
+        # One join copies every layer's buffers into the message together
+        return b''.join([header, session_id] + parts)
+    
+    @staticmethod
+    def frame_length(buffer: bytes) -> Optional[int]:
+        """
+        Get the total length of the message at the start of a buffer.
+        
+        Args:
+            buffer: The received bytes, starting at a message header
+            
+        Returns:
+            The header, session ID and payload length together, or None if
+            the header itself has not been received yet
+        """
+        if len(buffer) < _MESSAGE_HDR.size:
+            return None
+        _msg_type, _timestamp, session_id_length, data_length = _MESSAGE_HDR.unpack_from(buffer, 0)
+        return _MESSAGE_HDR.size + session_id_length + data_length
     
     @classmethod
     def from_bytes(cls, message_bytes: bytes) -> 'SessionMessage':
         """Create a message from bytes received from the Transport layer."""
-        message_dict = utils.deserialize_dict(message_bytes)
-        msg_type = message_dict['msg_type']
-        session_id = message_dict['session_id']
-        data = bytes.fromhex(message_dict['data'])
+        msg_type, timestamp, session_id_length, data_length = _MESSAGE_HDR.unpack_from(message_bytes, 0)
+        
+        # Slice the session ID and payload out as views rather than copies
+        view = memoryview(message_bytes)
+        session_id_start = _MESSAGE_HDR.size
+        data_start = session_id_start + session_id_length
+        session_id_raw = bytes(view[session_id_start:data_start])
+        data = view[data_start:data_start + data_length]
         
-        message = cls(msg_type, session_id, data)
-        message.timestamp = message_dict['timestamp']
+        message = cls(msg_type, session_id_raw.decode('utf-8'), data, session_id_raw)
+        message._timestamp = timestamp
         return message
-    
-    def is_connect(self) -> bool:
-        """Check if this is a CONNECT message."""
-        return self.msg_type == self.CONNECT
-    
-    def is_connect_ack(self) -> bool:
-        """Check if this is a CONNECT_ACK message."""
-        return self.msg_type == self.CONNECT_ACK
-    
-    def is_data(self) -> bool:
-        """Check if this is a DATA message."""
-        return self.msg_type == self.DATA
-    
-    def is_disconnect(self) -> bool:
-        """Check if this is a DISCONNECT message."""
-        return self.msg_type == self.DISCONNECT
-    
-    def is_disconnect_ack(self) -> bool:
-        """Check if this is a DISCONNECT_ACK message."""
-        return self.msg_type == self.DISCONNECT_ACK
-    
-    def is_keepalive(self) -> bool:
-        """Check if this is a KEEPALIVE message."""
-        return self.msg_type == self.KEEPALIVE
 
 
 class SessionLayer(OSILayer):
@@ -149,10 +198,22 @@ class SessionLayer(OSILayer):
     def __init__(self):
         """Initialize the Session Layer."""
         super().__init__("Session")
-        self.sessions: Dict[str, Session] = {}
+        # Kept in order of last activity, least recently active first
+        self.sessions: 'OrderedDict[str, Session]' = OrderedDict()
         self.local_port = 80  # Default port for HTTP
         self.remote_port = None
         self.remote_ip = None
+        # Bytes of a message that spans several segments, per (remote IP, remote port, local port)
+        self._recv_buffers: Dict[Tuple[str, int, int], bytearray] = {}
+        # Handler for each message type received by send_up
+        self._handlers: Dict[int, Callable[[SessionMessage, str, int, int], None]] = {
+            SessionMessage.CONNECT: self._handle_connect,
+            SessionMessage.CONNECT_ACK: self._handle_connect_ack,
+            SessionMessage.DISCONNECT: self._handle_disconnect,
+            SessionMessage.DISCONNECT_ACK: self._handle_disconnect_ack,
+            SessionMessage.KEEPALIVE: self._handle_keepalive,
+            SessionMessage.DATA: self._handle_data,
+        }
     
     def create_session(self) -> Session:
         """
@@ -177,6 +238,45 @@ class SessionLayer(OSILayer):
         """
         return self.sessions.get(session_id)
     
+    def touch_session(self, session: Session) -> None:
+        """
+        Record activity on a session and move it to the most recently active end.
+        
+        Args:
+            session: The session that saw activity
+        """
+        session.update_activity()
+        try:
+            self.sessions.move_to_end(session.session_id)
+        except KeyError:
+            pass
+    
+    def evict_idle(self, max_idle: float) -> int:
+        """
+        Drop sessions that have been idle for longer than max_idle seconds.
+        
+        Sessions are ordered by last activity, so this only looks at the
+        front of the table and stops at the first session still active.
+        
+        Nothing is sent to the peer and the layers above are not told, so
+        only call this for sessions both sides are done with.
+        
+        Args:
+            max_idle: The longest idle time, in seconds, a session may keep
+            
+        Returns:
+            The number of sessions evicted
+        """
+        evicted = 0
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.get_idle_time() <= max_idle:
+                break
+            self.sessions.popitem(last=False)
+            session.state = Session.CLOSED
+            evicted += 1
+        return evicted
+    
     def establish_session(self, remote_ip: str, remote_port: int) -> Session:
         """
         Establish a session with a remote host.
@@ -193,15 +293,18 @@ class SessionLayer(OSILayer):
         session.state = Session.CONNECTING
         
         # Store remote information
+        session.remote_ip = remote_ip
+        session.remote_port = remote_port
         self.remote_ip = remote_ip
         self.remote_port = remote_port
         
-        print(f"[{self.name}] Establishing session {session.session_id} with {remote_ip}:{remote_port}")
+        logger.info("[%s] Establishing session %s with %s:%s", self.name, session.session_id, remote_ip, remote_port)
         
         # Create a CONNECT message
         connect_message = SessionMessage(
             SessionMessage.CONNECT,
-            session.session_id
+            session.session_id,
+            session_id_raw=session.session_id_raw
         )
         
         # Send the message down to the Transport layer
@@ -235,17 +338,22 @@ class SessionLayer(OSILayer):
         session = Session(session_id)
         session.state = Session.ESTABLISHED
         self.sessions[session_id] = session
+        # A reconnect reuses the key, which would otherwise keep its old place
+        self.sessions.move_to_end(session_id)
         
         # Store remote information
+        session.remote_ip = remote_ip
+        session.remote_port = remote_port
         self.remote_ip = remote_ip
         self.remote_port = remote_port
         
-        print(f"[{self.name}] Accepted session {session_id} from {remote_ip}:{remote_port}")
+        logger.info("[%s] Accepted session %s from %s:%s", self.name, session_id, remote_ip, remote_port)
         
         # Create a CONNECT_ACK message
         connect_ack_message = SessionMessage(
             SessionMessage.CONNECT_ACK,
-            session_id
+            session_id,
+            session_id_raw=session.session_id_raw
         )
         
         # Send the message down to the Transport layer
@@ -259,39 +367,72 @@ class SessionLayer(OSILayer):
         
         return session
     
-    def send_data(self, session: Session, data: bytes) -> None:
+    def send_data(self, session: Session, data: Union[bytes, List[bytes]]) -> None:
         """
         Send data over a session.
         
         Args:
             session: The session to send data over
-            data: The data to send
+            data: The data to send, as one buffer or a list of buffers sent back to back
         """
         if not session.is_established():
-            print(f"[{self.name}] Cannot send data, session not established")
+            logger.warning("[%s] Cannot send data, session not established", self.name)
             return
         
-        print(f"[{self.name}] Sending {len(data)} bytes over session {session.session_id}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[%s] Sending %s bytes over session %s", self.name, sum(map(len, _as_parts(data))), session.session_id)
         
         # Update session activity
-        session.update_activity()
+        self.touch_session(session)
         
         # Create a DATA message
         data_message = SessionMessage(
             SessionMessage.DATA,
             session.session_id,
-            data
+            data,
+            session.session_id_raw
         )
         
         # Send the message down to the Transport layer
         if self.lower_layer:
             self.lower_layer.send_down(
                 data_message.to_bytes(),
-                remote_ip=self.remote_ip,
-                remote_port=self.remote_port,
+                remote_ip=session.remote_ip or self.remote_ip,
+                remote_port=session.remote_port or self.remote_port,
                 local_port=self.local_port
             )
     
+    def broadcast(self, data: Union[bytes, List[bytes]], session_ids: Optional[List[str]] = None) -> int:
+        """
+        Send the same data over several sessions.
+        
+        The payload is shared by every message; only the session header is built
+        per session. Each message goes to its own session's peer. The peer parses it as a presentation message, so application
+        data should go through PresentationLayer.broadcast(), which encrypts and
+        compresses it once for all of them.
+        
+        Args:
+            data: A presentation message, as one buffer or a list of buffers sent back to back
+            session_ids: The sessions to send to. If None, every established session is used.
+        
+        Returns:
+            The number of sessions the data was sent over
+        """
+        parts = _as_parts(data)
+        
+        # Look the sessions up first, since sending reorders the session table
+        if session_ids is None:
+            sessions = list(self.sessions.values())
+        else:
+            sessions = [self.sessions[session_id] for session_id in session_ids if session_id in self.sessions]
+        
+        sent = 0
+        for session in sessions:
+            if session.is_established():
+                self.send_data(session, parts)
+                sent += 1
+        return sent
+    
     def close_session(self, session: Session) -> None:
         """
         Close a session.
@@ -300,10 +441,10 @@ class SessionLayer(OSILayer):
             session: The session to close
         """
         if session.state == Session.CLOSED:
-            print(f"[{self.name}] Session already closed")
+            logger.warning("[%s] Session already closed", self.name)
             return
         
-        print(f"[{self.name}] Closing session {session.session_id}")
+        logger.info("[%s] Closing session %s", self.name, session.session_id)
         
         # Update session state
         session.state = Session.DISCONNECTING
@@ -311,15 +452,16 @@ class SessionLayer(OSILayer):
         # Create a DISCONNECT message
         disconnect_message = SessionMessage(
             SessionMessage.DISCONNECT,
-            session.session_id
+            session.session_id,
+            session_id_raw=session.session_id_raw
         )
         
         # Send the message down to the Transport layer
         if self.lower_layer:
             self.lower_layer.send_down(
                 disconnect_message.to_bytes(),
-                remote_ip=self.remote_ip,
-                remote_port=self.remote_port,
+                remote_ip=session.remote_ip or self.remote_ip,
+                remote_port=session.remote_port or self.remote_port,
                 local_port=self.local_port
             )
         
@@ -331,12 +473,111 @@ class SessionLayer(OSILayer):
         if session.session_id in self.sessions:
             del self.sessions[session.session_id]
     
-    def send_down(self, data: bytes, **kwargs) -> None:
+    def _handle_connect(self, message: SessionMessage, remote_ip: str, remote_port: int, local_port: int) -> None:
+        """Handle a CONNECT message by accepting the session."""
+        logger.debug("[%s] Received CONNECT request", self.name)
+        
+        # Accept the session
+        self.accept_session(message.session_id, remote_ip, remote_port)
+    
+    def _handle_connect_ack(self, message: SessionMessage, remote_ip: str, remote_port: int, local_port: int) -> None:
+        """Handle a CONNECT_ACK message by marking the session established."""
+        logger.debug("[%s] Received CONNECT_ACK", self.name)
+        
+        # Get the session
+        session = self.get_session(message.session_id)
+        if not session:
+            logger.warning("[%s] No session found for ID %s", self.name, message.session_id)
+            return
+        
+        # Update session state
+        session.state = Session.ESTABLISHED
+    
+    def _handle_disconnect(self, message: SessionMessage, remote_ip: str, remote_port: int, local_port: int) -> None:
+        """Handle a DISCONNECT message by closing the session and acknowledging it."""
+        logger.debug("[%s] Received DISCONNECT request", self.name)
+        
+        # Get the session
+        session = self.get_session(message.session_id)
+        if not session:
+            logger.warning("[%s] No session found for ID %s", self.name, message.session_id)
+            return
+        
+        # Update session state
+        session.state = Session.CLOSED
+        
+        # Send DISCONNECT_ACK
+        disconnect_ack_message = SessionMessage(
+            SessionMessage.DISCONNECT_ACK,
+            message.session_id,
+            session_id_raw=message.session_id_raw
+        )
+        
+        # Send the message down to the Transport layer
+        if self.lower_layer:
+            self.lower_layer.send_down(
+                disconnect_ack_message.to_bytes(),
+                remote_ip=remote_ip,
+                remote_port=remote_port,
+                local_port=local_port
+            )
+        
+        # Remove the session from our list
+        if message.session_id in self.sessions:
+            del self.sessions[message.session_id]
+    
+    def _handle_disconnect_ack(self, message: SessionMessage, remote_ip: str, remote_port: int, local_port: int) -> None:
+        """Handle a DISCONNECT_ACK message by forgetting the session."""
+        logger.debug("[%s] Received DISCONNECT_ACK", self.name)
+        
+        # Remove the session from our list
+        if message.session_id in self.sessions:
+            del self.sessions[message.session_id]
+    
+    def _handle_keepalive(self, message: SessionMessage, remote_ip: str, remote_port: int, local_port: int) -> None:
+        """Handle a KEEPALIVE message by recording activity on the session."""
+        logger.debug("[%s] Received KEEPALIVE", self.name)
+        
+        # Get the session
+        session = self.get_session(message.session_id)
+        if not session:
+            logger.warning("[%s] No session found for ID %s", self.name, message.session_id)
+            return
+        
+        # Update session activity
+        self.touch_session(session)
+    
+    def _handle_data(self, message: SessionMessage, remote_ip: str, remote_port: int, local_port: int) -> None:
+        """Handle a DATA message by passing its payload up to the Presentation layer."""
+        # Get the session
+        session = self.get_session(message.session_id)
+        if not session:
+            logger.warning("[%s] No session found for ID %s", self.name, message.session_id)
+            return
+        
+        # Check if the session is established
+        if not session.is_established():
+            logger.warning("[%s] Session not established, discarding data", self.name)
+            return
+        
+        # Update session activity
+        self.touch_session(session)
+        
+        logger.debug("[%s] Received %s bytes of data", self.name, len(message.data))
+        
+        # Send the data up to the Presentation layer
+        if self.upper_layer:
+            self.upper_layer.send_up(
+                data=message.data,
+                session_id=message.session_id
+            )
+    
+    def send_down(self, data: Union[bytes, List[bytes]], **kwargs) -> None:
         """
         Process data from the Presentation layer and send it down to the Transport layer.
         
         Args:
-            data: The data to be sent
+            data: The data to be sent, as one buffer or a list of buffers
             **kwargs: Additional parameters, may include session information
         """
         session_id = kwargs.get('session_id')
@@ -352,7 +593,7 @@ class SessionLayer(OSILayer):
             remote_port = kwargs.get('remote_port')
             
             if not remote_ip or not remote_port:
-                print(f"[{self.name}] No remote information provided, cannot establish session")
+                logger.warning("[%s] No remote information provided, cannot establish session", self.name)
                 return
             
             session = self.establish_session(remote_ip, remote_port)
@@ -372,13 +613,49 @@ class SessionLayer(OSILayer):
         remote_port = kwargs.get('remote_port')
         remote_ip = kwargs.get('remote_ip')
         
-        print(f"[{self.name}] Received message, size: {len(data)} bytes")
+        logger.debug("[%s] Received message, size: %s bytes", self.name, len(data))
+        
+        # Transport hands up each segment as it arrives, so a large message comes
+        # in pieces; hold them until the header's declared length is all here
+        key = (remote_ip, remote_port, local_port)
+        pending = self._recv_buffers.get(key)
+        if pending is None and SessionMessage.frame_length(data) == len(data):
+            # The common case: exactly one whole message, parsed without a copy
+            self._process_message(data, remote_ip, remote_port, local_port)
+            return
+        
+        if pending is None:
+            pending = self._recv_buffers[key] = bytearray()
+        pending += data
         
+        try:
+            while True:
+                length = SessionMessage.frame_length(pending)
+                if length is None or len(pending) < length:
+                    logger.debug("[%s] Buffered %s bytes of a partial message", self.name, len(pending))
+                    return
+                message_bytes = bytes(pending[:length])
+                del pending[:length]
+                self._process_message(message_bytes, remote_ip, remote_port, local_port)
+        finally:
+            if not pending:
+                self._recv_buffers.pop(key, None)
+    
+    def _process_message(self, data: bytes, remote_ip: str, remote_port: int, local_port: int) -> None:
+        """
+        Parse one complete message and dispatch it to the handler for its type.
+        
+        Args:
+            data: The message bytes
+            remote_ip: The IP address the message came from
+            remote_port: The port the message came from
+            local_port: The port the message arrived on
+        """
         # Parse the message
         try:
             message = SessionMessage.from_bytes(data)
             
-            print(f"[{self.name}] Message: Type={message.msg_type}, Session={message.session_id}")
+            logger.debug("[%s] Message: Type=%s, Session=%s", self.name, message.msg_type, message.session_id)
             
             # Store remote information if not already set
             if not self.remote_ip:
@@ -386,111 +663,11 @@ class SessionLayer(OSILayer):
             if not self.remote_port:
                 self.remote_port = remote_port
             
-            # Handle CONNECT message
-            if message.is_connect():
-                print(f"[{self.name}] Received CONNECT request")
-                
-                # Accept the session
-                session = self.accept_session(message.session_id, remote_ip, remote_port)
-                return
-            
-            # Handle CONNECT_ACK message
-            if message.is_connect_ack():
-                print(f"[{self.name}] Received CONNECT_ACK")
-                
-                # Get the session
-                session = self.get_session(message.session_id)
-                if not session:
-                    print(f"[{self.name}] No session found for ID {message.session_id}")
-                    return
-                
-                # Update session state
-                session.state = Session.ESTABLISHED
-                return
-            
-            # Handle DISCONNECT message
-            if message.is_disconnect():
-                print(f"[{self.name}] Received DISCONNECT request")
-                
-                # Get the session
-                session = self.get_session(message.session_id)
-                if not session:
-                    print(f"[{self.name}] No session found for ID {message.session_id}")
-                    return
-                
-                # Update session state
-                session.state = Session.CLOSED
-                
-                # Send DISCONNECT_ACK
-                disconnect_ack_message = SessionMessage(
-                    SessionMessage.DISCONNECT_ACK,
-                    message.session_id
-                )
-                
-                # Send the message down to the Transport layer
-                if self.lower_layer:
-                    self.lower_layer.send_down(
-                        disconnect_ack_message.to_bytes(),
-                        remote_ip=remote_ip,
-                        remote_port=remote_port,
-                        local_port=local_port
-                    )
-                
-                # Remove the session from our list
-                if message.session_id in self.sessions:
-                    del self.sessions[message.session_id]
-                
-                return
-            
-            # Handle DISCONNECT_ACK message
-            if message.is_disconnect_ack():
-                print(f"[{self.name}] Received DISCONNECT_ACK")
-                
-                # Remove the session from our list
-                if message.session_id in self.sessions:
-                    del self.sessions[message.session_id]
-                
-                return
-            
-            # Handle KEEPALIVE message
-            if message.is_keepalive():
-                print(f"[{self.name}] Received KEEPALIVE")
-                
-                # Get the session
-                session = self.get_session(message.session_id)
-                if not session:
-                    print(f"[{self.name}] No session found for ID {message.session_id}")
-                    return
-                
-                # Update session activity
-                session.update_activity()
-                return
-            
-            # Handle DATA message
-            if message.is_data():
-                # Get the session
-                session = self.get_session(message.session_id)
-                if not session:
-                    print(f"[{self.name}] No session found for ID {message.session_id}")
-                    return
-                
-                # Check if the session is established
-                if not session.is_established():
-                    print(f"[{self.name}] Session not established, discarding data")
-                    return
-                
-                # Update session activity
-                session.update_activity()
-                
-                print(f"[{self.name}] Received {len(message.data)} bytes of data")
-                
-                # Send the data up to the Presentation layer
-                if self.upper_layer:
-                    self.upper_layer.send_up(
-                        data=message.data,
-                        session_id=message.session_id
-                    )
+            # Dispatch on the message type
+            handler = self._handlers.get(message.msg_type)
+            if handler:
+                handler(message, remote_ip, remote_port, local_port)
         
         except Exception as e:
-            print(f"[{self.name}] Error processing message: {e}")
-            return 
\ No newline at end of file
+            logger.error("[%s] Error processing message: %s", self.name, e)
+            return
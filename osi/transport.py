@@ -6,10 +6,30 @@ It handles segmentation, flow control, error recovery, and connection management
 """
 from typing import Any, Dict, Optional, Tuple, List, Set
 import random
+import struct
 import time
+import logging
 
 from osi import OSILayer
-import utils
+
+
+logger = logging.getLogger(__name__)
+
+# Segment header: src port, dst port, sequence number, acknowledgment number, flags,
+# window, payload length; followed by the raw payload
+_SEGMENT_HDR = struct.Struct('!HHIIBHH')
+
+# Protocol number the Network layer carries TCP segments under
+PROTO_TCP = 6
+
+# Sequence and acknowledgment numbers are 32-bit and wrap around
+_SEQ_MODULUS = 1 << 32
+
+# Largest payload carried by one segment
+_MAX_SEGMENT_SIZE = 1024
+
+# Most segments kept for reuse by Segment.acquire()
+_SEGMENT_POOL_SIZE = 1024
 
 
 class Segment:
@@ -25,6 +45,8 @@ class Segment:
     ACK = 0x10
     FIN = 0x01
     
+    __slots__ = ('src_port', 'dst_port', 'seq_num', 'ack_num', 'flags', 'window', 'data')
+    
     def __init__(
         self,
         src_port: int,
@@ -55,30 +77,71 @@ class Segment:
         self.window = window
         self.data = data
     
+    @classmethod
+    def acquire(
+        cls,
+        src_port: int,
+        dst_port: int,
+        seq_num: int,
+        ack_num: int,
+        flags: int,
+        window: int,
+        data: bytes
+    ) -> 'Segment':
+        """
+        Get a segment, reusing one handed back with release() if there is one.
+        
+        Takes the same arguments as the constructor.
+        
+        Returns:
+            The segment, with its fields set from the arguments
+        """
+        try:
+            segment = _segment_pool.pop()
+        except IndexError:
+            return cls(src_port, dst_port, seq_num, ack_num, flags, window, data)
+        segment.src_port = src_port
+        segment.dst_port = dst_port
+        segment.seq_num = seq_num
+        segment.ack_num = ack_num
+        segment.flags = flags
+        segment.window = window
+        segment.data = data
+        return segment
+    
+    def release(self) -> None:
+        """Hand the segment back for reuse once it has been serialized and sent."""
+        # Drop the payload so the pool doesn't keep it alive
+        self.data = b''
+        if len(_segment_pool) < _SEGMENT_POOL_SIZE:
+            _segment_pool.append(self)
+    
+    def header_bytes(self) -> bytes:
+        """Get just the segment header, so it can be sent ahead of the payload without copying it."""
+        return _SEGMENT_HDR.pack(
+            self.src_port,
+            self.dst_port,
+            self.seq_num,
+            self.ack_num,
+            self.flags,
+            self.window,
+            len(self.data)
+        )
+    
     def to_bytes(self) -> bytes:
         """Convert the segment to bytes for transmission."""
-        segment_dict = {
-            'src_port': self.src_port,
-            'dst_port': self.dst_port,
-            'seq_num': self.seq_num,
-            'ack_num': self.ack_num,
-            'flags': self.flags,
-            'window': self.window,
-            'data': self.data.hex()
-        }
-        return utils.serialize_dict(segment_dict)
+        # Format: fixed binary header followed by the raw payload
+        return b''.join((self.header_bytes(), self.data))
     
     @classmethod
     def from_bytes(cls, segment_bytes: bytes) -> 'Segment':
         """Create a segment from bytes received from the Network layer."""
-        segment_dict = utils.deserialize_dict(segment_bytes)
-        src_port = segment_dict['src_port']
-        dst_port = segment_dict['dst_port']
-        seq_num = segment_dict['seq_num']
-        ack_num = segment_dict['ack_num']
-        flags = segment_dict['flags']
-        window = segment_dict['window']
-        data = bytes.fromhex(segment_dict['data'])
+        (src_port, dst_port, seq_num, ack_num,
+         flags, window, data_length) = _SEGMENT_HDR.unpack_from(segment_bytes, 0)
+        
+        # Take the payload as a view into the received buffer rather than a copy
+        start = _SEGMENT_HDR.size
+        data = memoryview(segment_bytes)[start:start + data_length]
         
         return cls(src_port, dst_port, seq_num, ack_num, flags, window, data)
     
@@ -95,6 +158,10 @@ class Segment:
         return bool(self.flags & self.FIN)
 
 
+# Segments handed back with Segment.release(), waiting to be reused
+_segment_pool: List[Segment] = []
+
+
 class Connection:
     """
     A transport layer connection.
@@ -115,6 +182,9 @@ class Connection:
     LAST_ACK = 9
     TIME_WAIT = 10
     
+    __slots__ = ('local_port', 'remote_port', 'remote_ip', 'state', 'seq_num', 'ack_num', 'window',
+                 'send_buffer', 'recv_buffer', 'expected_seq', 'segments_to_ack', '_ack_template')
+    
     def __init__(self, local_port: int, remote_port: Optional[int] = None, remote_ip: Optional[str] = None):
         """
         Initialize a connection.
@@ -128,18 +198,42 @@ class Connection:
         self.remote_port = remote_port
         self.remote_ip = remote_ip
         self.state = self.CLOSED
-        self.seq_num = random.randint(0, 0xFFFFFFFF)
+        # One C-level draw of 32 random bits, rather than randint()'s range arithmetic
+        self.seq_num = random.getrandbits(32)
         self.ack_num = 0
         self.window = 65535
-        self.send_buffer = b''
-        self.recv_buffer = b''
+        # Grown in place and consumed from the front, so long flows don't recopy the whole buffer
+        self.send_buffer = bytearray()
+        self.recv_buffer = bytearray()
         self.expected_seq = 0
         self.segments_to_ack: Set[int] = set()
+        # Reused for every ACK the connection sends; created on the first one
+        self._ack_template: Optional[Segment] = None
     
     def is_established(self) -> bool:
         """Check if the connection is established."""
         return self.state == self.ESTABLISHED
     
+    def ack_segment(self) -> Segment:
+        """
+        Get an ACK segment acknowledging everything received so far.
+        
+        The same segment object is reused for every ACK on the connection, so it
+        must be serialized before the next call.
+        
+        Returns:
+            The ACK segment, carrying the current sequence number and expected sequence
+        """
+        template = self._ack_template
+        if template is None:
+            template = self._ack_template = Segment(
+                self.local_port, self.remote_port, 0, 0, Segment.ACK, self.window, b''
+            )
+        template.seq_num = self.seq_num
+        template.ack_num = self.expected_seq
+        template.window = self.window
+        return template
+    
     def add_to_recv_buffer(self, data: bytes) -> None:
         """Add data to the receive buffer."""
         self.recv_buffer += data
@@ -147,11 +241,11 @@ class Connection:
     def get_from_recv_buffer(self, size: Optional[int] = None) -> bytes:
         """Get data from the receive buffer."""
         if size is None or size >= len(self.recv_buffer):
-            data = self.recv_buffer
-            self.recv_buffer = b''
+            data = bytes(self.recv_buffer)
+            self.recv_buffer.clear()
         else:
-            data = self.recv_buffer[:size]
-            self.recv_buffer = self.recv_buffer[size:]
+            data = bytes(self.recv_buffer[:size])
+            del self.recv_buffer[:size]
         return data
     
     def add_to_send_buffer(self, data: bytes) -> None:
@@ -161,11 +255,11 @@ class Connection:
     def get_from_send_buffer(self, size: int) -> bytes:
         """Get data from the send buffer."""
         if size >= len(self.send_buffer):
-            data = self.send_buffer
-            self.send_buffer = b''
+            data = bytes(self.send_buffer)
+            self.send_buffer.clear()
         else:
-            data = self.send_buffer[:size]
-            self.send_buffer = self.send_buffer[size:]
+            data = bytes(self.send_buffer[:size])
+            del self.send_buffer[:size]
         return data
 
 
@@ -180,8 +274,46 @@ class TransportLayer(OSILayer):
         """Initialize the Transport Layer."""
         super().__init__("Transport")
         self.connections: Dict[int, Connection] = {}
+        # The same connections indexed by (remote IP, remote port), for connections whose
+        # remote end is known; kept in step with self.connections
+        self._by_remote: Dict[Tuple[str, int], Connection] = {}
         self.next_port = 49152  # Start with ephemeral ports
     
+    def _add_connection(self, connection: Connection) -> None:
+        """
+        Record a connection under its local port and, if known, its remote address.
+        
+        Args:
+            connection: The connection to record
+        """
+        previous = self.connections.get(connection.local_port)
+        if previous is not None and previous is not connection:
+            # A connection replacing another on the same port takes over from it completely
+            self._remove_connection(previous)
+        self.connections[connection.local_port] = connection
+        if connection.remote_ip is not None and connection.remote_port is not None:
+            # Like the old scan of self.connections, the earliest connection wins
+            self._by_remote.setdefault((connection.remote_ip, connection.remote_port), connection)
+    
+    def _remove_connection(self, connection: Connection) -> None:
+        """
+        Forget the connection on a connection's local port.
+        
+        Args:
+            connection: The connection to forget
+        """
+        removed = self.connections.pop(connection.local_port, None)
+        if removed is None:
+            return
+        key = (removed.remote_ip, removed.remote_port)
+        if self._by_remote.get(key) is removed:
+            del self._by_remote[key]
+            # Fall back to any other connection to the same remote end
+            for other in self.connections.values():
+                if (other.remote_ip, other.remote_port) == key:
+                    self._by_remote[key] = other
+                    break
+    
     def create_connection(self, remote_port: int, remote_ip: str) -> Connection:
         """
         Create a new connection to a remote host.
@@ -197,7 +329,7 @@ class TransportLayer(OSILayer):
         self.next_port += 1
         
         connection = Connection(local_port, remote_port, remote_ip)
-        self.connections[local_port] = connection
+        self._add_connection(connection)
         
         return connection
     
@@ -224,10 +356,7 @@ class TransportLayer(OSILayer):
         Returns:
             The connection if found, None otherwise
         """
-        for conn in self.connections.values():
-            if conn.remote_port == remote_port and conn.remote_ip == remote_ip:
-                return conn
-        return None
+        return self._by_remote.get((remote_ip, remote_port))
     
     def connect(self, remote_port: int, remote_ip: str) -> Connection:
         """
@@ -244,10 +373,10 @@ class TransportLayer(OSILayer):
         connection = self.create_connection(remote_port, remote_ip)
         connection.state = Connection.SYN_SENT
         
-        print(f"[{self.name}] Initiating connection to {remote_ip}:{remote_port}")
+        logger.info("[%s] Initiating connection to %s:%s", self.name, remote_ip, remote_port)
         
         # Send SYN segment
-        syn_segment = Segment(
+        syn_segment = Segment.acquire(
             connection.local_port,
             remote_port,
             connection.seq_num,
@@ -258,16 +387,19 @@ class TransportLayer(OSILayer):
         )
         
         # Increment sequence number
-        connection.seq_num += 1
+        connection.seq_num = (connection.seq_num + 1) % _SEQ_MODULUS
         
         # Send the segment down to the Network layer
         if self.lower_layer:
             self.lower_layer.send_down(
                 syn_segment.to_bytes(),
                 dst_ip=remote_ip,
-                protocol=6  # TCP
+                protocol=PROTO_TCP
             )
         
+        # The segment has been serialized, so it can be reused
+        syn_segment.release()
+        
         # In a real implementation, we would wait for the SYN-ACK response
         # For simplicity, we'll just assume the connection is established
         connection.state = Connection.ESTABLISHED
@@ -287,9 +419,9 @@ class TransportLayer(OSILayer):
         # Create a new connection in LISTEN state
         connection = Connection(local_port)
         connection.state = Connection.LISTEN
-        self.connections[local_port] = connection
+        self._add_connection(connection)
         
-        print(f"[{self.name}] Listening on port {local_port}")
+        logger.info("[%s] Listening on port %s", self.name, local_port)
         
         return connection
     
@@ -302,34 +434,41 @@ class TransportLayer(OSILayer):
             data: The data to send
         """
         if not connection.is_established():
-            print(f"[{self.name}] Cannot send data, connection not established")
+            logger.warning("[%s] Cannot send data, connection not established", self.name)
             return
         
-        print(f"[{self.name}] Sending {len(data)} bytes over connection {connection.local_port} -> {connection.remote_ip}:{connection.remote_port}")
+        logger.debug("[%s] Sending %s bytes over connection %s -> %s:%s", self.name, len(data), connection.local_port, connection.remote_ip, connection.remote_port)
         
         # Add data to the send buffer
         connection.add_to_send_buffer(data)
         
-        # Create a segment with the data
-        segment = Segment(
-            connection.local_port,
-            connection.remote_port,
-            connection.seq_num,
-            connection.ack_num,
-            Segment.ACK,
-            connection.window,
-            connection.get_from_send_buffer(1024)  # Maximum segment size
-        )
-        
-        # Increment sequence number
-        connection.seq_num += len(segment.data)
+        # Cut the whole buffer into segments, so they all go down the stack together
+        segments = []
+        while connection.send_buffer:
+            segment = Segment.acquire(
+                connection.local_port,
+                connection.remote_port,
+                connection.seq_num,
+                connection.ack_num,
+                Segment.ACK,
+                connection.window,
+                connection.get_from_send_buffer(_MAX_SEGMENT_SIZE)
+            )
+            
+            # Increment sequence number
+            connection.seq_num = (connection.seq_num + len(segment.data)) % _SEQ_MODULUS
+            
+            segments.append(segment.to_bytes())
+            
+            # The segment has been serialized, so it can be reused
+            segment.release()
         
-        # Send the segment down to the Network layer
+        # Send the segments down to the Network layer
         if self.lower_layer:
-            self.lower_layer.send_down(
-                segment.to_bytes(),
+            self.lower_layer.send_down_batch(
+                segments,
                 dst_ip=connection.remote_ip,
-                protocol=6  # TCP
+                protocol=PROTO_TCP
             )
     
     def close(self, connection: Connection) -> None:
@@ -340,13 +479,13 @@ class TransportLayer(OSILayer):
             connection: The connection to close
         """
         if connection.state == Connection.CLOSED:
-            print(f"[{self.name}] Connection already closed")
+            logger.warning("[%s] Connection already closed", self.name)
             return
         
-        print(f"[{self.name}] Closing connection {connection.local_port} -> {connection.remote_ip}:{connection.remote_port}")
+        logger.info("[%s] Closing connection %s -> %s:%s", self.name, connection.local_port, connection.remote_ip, connection.remote_port)
         
         # Send FIN segment
-        fin_segment = Segment(
+        fin_segment = Segment.acquire(
             connection.local_port,
             connection.remote_port,
             connection.seq_num,
@@ -357,7 +496,7 @@ class TransportLayer(OSILayer):
         )
         
         # Increment sequence number
-        connection.seq_num += 1
+        connection.seq_num = (connection.seq_num + 1) % _SEQ_MODULUS
         
         # Update connection state
         connection.state = Connection.FIN_WAIT_1
@@ -367,29 +506,31 @@ class TransportLayer(OSILayer):
             self.lower_layer.send_down(
                 fin_segment.to_bytes(),
                 dst_ip=connection.remote_ip,
-                protocol=6  # TCP
+                protocol=PROTO_TCP
             )
         
+        # The segment has been serialized, so it can be reused
+        fin_segment.release()
+        
         # In a real implementation, we would wait for the FIN-ACK response
         # For simplicity, we'll just assume the connection is closed
         connection.state = Connection.CLOSED
         
         # Remove the connection from our list
-        if connection.local_port in self.connections:
-            del self.connections[connection.local_port]
+        self._remove_connection(connection)
     
-    def send_down(self, data: bytes, **kwargs) -> None:
+    def send_down(self, data: bytes, local_port: Optional[int] = None, remote_port: Optional[int] = None,
+                  remote_ip: Optional[str] = None, **kwargs) -> None:
         """
         Process data from the Session layer and send it down to the Network layer.
         
         Args:
             data: The data to be segmented and sent
-            **kwargs: Additional parameters, may include connection information
+            local_port: The local port of the connection to send over
+            remote_port: The remote port, used to find or open a connection
+            remote_ip: The remote IP address, used to find or open a connection
+            **kwargs: Additional parameters
         """
-        local_port = kwargs.get('local_port')
-        remote_port = kwargs.get('remote_port')
-        remote_ip = kwargs.get('remote_ip')
-        
         # Get or create the connection
         connection = None
         if local_port:
@@ -401,175 +542,163 @@ class TransportLayer(OSILayer):
                 connection = self.connect(remote_port, remote_ip)
         
         if not connection:
-            print(f"[{self.name}] No connection available, cannot send data")
+            logger.warning("[%s] No connection available, cannot send data", self.name)
             return
         
         # Send the data over the connection
         self.send(connection, data)
     
-    def send_up(self, data: bytes, **kwargs) -> None:
+    def send_up(self, data: bytes, src_ip: Optional[str] = None, protocol: Optional[int] = None,
+                **kwargs) -> None:
         """
         Process data from the Network layer and send it up to the Session layer.
         
         Args:
             data: The segmented data received from the Network layer
+            src_ip: The IP address the segment came from
+            protocol: The protocol number of the packet that carried the segment
             **kwargs: Additional parameters
         """
-        src_ip = kwargs.get('src_ip')
-        protocol = kwargs.get('protocol')
-        
         # Check if this is a TCP segment
-        if protocol != 6:
-            print(f"[{self.name}] Not a TCP segment (protocol: {protocol}), discarding")
+        if protocol != PROTO_TCP:
+            logger.warning("[%s] Not a TCP segment (protocol: %s), discarding", self.name, protocol)
             return
         
-        print(f"[{self.name}] Received segment, size: {len(data)} bytes")
+        logger.debug("[%s] Received segment, size: %s bytes", self.name, len(data))
         
-        # Parse the segment
+        # Parse the segment; only a truncated segment can fail here
         try:
             segment = Segment.from_bytes(data)
+        except struct.error as e:
+            logger.error("[%s] Error processing segment: %s", self.name, e)
+            return
+        
+        logger.debug("[%s] Segment: %s -> %s (SEQ: %s, ACK: %s, Flags: %02x)", self.name, segment.src_port, segment.dst_port, segment.seq_num, segment.ack_num, segment.flags)
+        
+        # Find the connection
+        connection = self.get_connection(segment.dst_port)
+        
+        # If no connection exists and this is a SYN segment, create one
+        if not connection and segment.is_syn():
+            connection = Connection(segment.dst_port, segment.src_port, src_ip)
+            connection.state = Connection.SYN_RECEIVED
+            connection.ack_num = (segment.seq_num + 1) % _SEQ_MODULUS
+            self._add_connection(connection)
             
-            print(f"[{self.name}] Segment: {segment.src_port} -> {segment.dst_port} (SEQ: {segment.seq_num}, ACK: {segment.ack_num}, Flags: {segment.flags:02x})")
+            # Send SYN-ACK segment
+            syn_ack_segment = Segment.acquire(
+                connection.local_port,
+                connection.remote_port,
+                connection.seq_num,
+                connection.ack_num,
+                Segment.SYN | Segment.ACK,
+                connection.window,
+                b''
+            )
             
-            # Find the connection
-            connection = self.get_connection(segment.dst_port)
+            # Increment sequence number
+            connection.seq_num = (connection.seq_num + 1) % _SEQ_MODULUS
             
-            # If no connection exists and this is a SYN segment, create one
-            if not connection and segment.is_syn():
-                connection = Connection(segment.dst_port, segment.src_port, src_ip)
-                connection.state = Connection.SYN_RECEIVED
-                connection.ack_num = segment.seq_num + 1
-                self.connections[segment.dst_port] = connection
-                
-                # Send SYN-ACK segment
-                syn_ack_segment = Segment(
-                    connection.local_port,
-                    connection.remote_port,
-                    connection.seq_num,
-                    connection.ack_num,
-                    Segment.SYN | Segment.ACK,
-                    connection.window,
-                    b''
+            # Send the segment down to the Network layer
+            if self.lower_layer:
+                self.lower_layer.send_down(
+                    syn_ack_segment.to_bytes(),
+                    dst_ip=connection.remote_ip,
+                    protocol=PROTO_TCP
+                )
+            
+            # The segment has been serialized, so it can be reused
+            syn_ack_segment.release()
+            
+            # Update connection state
+            connection.state = Connection.ESTABLISHED
+            
+            logger.info("[%s] Connection established: %s <- %s:%s", self.name, connection.local_port, connection.remote_ip, connection.remote_port)
+        
+        # If no connection exists and this is not a SYN segment, discard
+        if not connection:
+            logger.warning("[%s] No connection for port %s, discarding", self.name, segment.dst_port)
+            return
+        
+        # Handle FIN segment
+        if segment.is_fin():
+            logger.info("[%s] Received FIN, closing connection", self.name)
+            
+            # Send FIN-ACK segment
+            fin_ack_segment = Segment.acquire(
+                connection.local_port,
+                connection.remote_port,
+                connection.seq_num,
+                (segment.seq_num + 1) % _SEQ_MODULUS,
+                Segment.FIN | Segment.ACK,
+                connection.window,
+                b''
+            )
+            
+            # Increment sequence number
+            connection.seq_num = (connection.seq_num + 1) % _SEQ_MODULUS
+            
+            # Send the segment down to the Network layer
+            if self.lower_layer:
+                self.lower_layer.send_down(
+                    fin_ack_segment.to_bytes(),
+                    dst_ip=connection.remote_ip,
+                    protocol=PROTO_TCP
                 )
+            
+            # The segment has been serialized, so it can be reused
+            fin_ack_segment.release()
+            
+            # Update connection state
+            connection.state = Connection.CLOSED
+            
+            # Remove the connection from our list
+            self._remove_connection(connection)
+            
+            return
+        
+        # Handle data segment
+        if segment.data:
+            # Check if the sequence number is what we expect
+            if segment.seq_num == connection.expected_seq:
+                # Add the data to the receive buffer
+                connection.add_to_recv_buffer(segment.data)
+                
+                # Update the expected sequence number
+                connection.expected_seq = (segment.seq_num + len(segment.data)) % _SEQ_MODULUS
                 
-                # Increment sequence number
-                connection.seq_num += 1
+                # Send ACK segment
+                ack_segment = connection.ack_segment()
                 
                 # Send the segment down to the Network layer
                 if self.lower_layer:
                     self.lower_layer.send_down(
-                        syn_ack_segment.to_bytes(),
+                        ack_segment.to_bytes(),
                         dst_ip=connection.remote_ip,
-                        protocol=6  # TCP
+                        protocol=PROTO_TCP
                     )
                 
-                # Update connection state
-                connection.state = Connection.ESTABLISHED
-                
-                print(f"[{self.name}] Connection established: {connection.local_port} <- {connection.remote_ip}:{connection.remote_port}")
-            
-            # If no connection exists and this is not a SYN segment, discard
-            if not connection:
-                print(f"[{self.name}] No connection for port {segment.dst_port}, discarding")
-                return
-            
-            # Handle FIN segment
-            if segment.is_fin():
-                print(f"[{self.name}] Received FIN, closing connection")
+                # Send the data up to the Session layer
+                if self.upper_layer:
+                    self.upper_layer.send_up(
+                        data=connection.get_from_recv_buffer(),
+                        local_port=connection.local_port,
+                        remote_port=connection.remote_port,
+                        remote_ip=connection.remote_ip
+                    )
+            else:
+                logger.warning("[%s] Out-of-order segment, expected SEQ %s, got %s", self.name, connection.expected_seq, segment.seq_num)
                 
-                # Send FIN-ACK segment
-                fin_ack_segment = Segment(
-                    connection.local_port,
-                    connection.remote_port,
-                    connection.seq_num,
-                    segment.seq_num + 1,
-                    Segment.FIN | Segment.ACK,
-                    connection.window,
-                    b''
-                )
+                # Add to segments to acknowledge
+                connection.segments_to_ack.add(segment.seq_num)
                 
-                # Increment sequence number
-                connection.seq_num += 1
+                # Send duplicate ACK
+                dup_ack_segment = connection.ack_segment()
                 
                 # Send the segment down to the Network layer
                 if self.lower_layer:
                     self.lower_layer.send_down(
-                        fin_ack_segment.to_bytes(),
+                        dup_ack_segment.to_bytes(),
                         dst_ip=connection.remote_ip,
-                        protocol=6  # TCP
-                    )
-                
-                # Update connection state
-                connection.state = Connection.CLOSED
-                
-                # Remove the connection from our list
-                if connection.local_port in self.connections:
-                    del self.connections[connection.local_port]
-                
-                return
-            
-            # Handle data segment
-            if segment.data:
-                # Check if the sequence number is what we expect
-                if segment.seq_num == connection.expected_seq:
-                    # Add the data to the receive buffer
-                    connection.add_to_recv_buffer(segment.data)
-                    
-                    # Update the expected sequence number
-                    connection.expected_seq = segment.seq_num + len(segment.data)
-                    
-                    # Send ACK segment
-                    ack_segment = Segment(
-                        connection.local_port,
-                        connection.remote_port,
-                        connection.seq_num,
-                        connection.expected_seq,
-                        Segment.ACK,
-                        connection.window,
-                        b''
-                    )
-                    
-                    # Send the segment down to the Network layer
-                    if self.lower_layer:
-                        self.lower_layer.send_down(
-                            ack_segment.to_bytes(),
-                            dst_ip=connection.remote_ip,
-                            protocol=6  # TCP
-                        )
-                    
-                    # Send the data up to the Session layer
-                    if self.upper_layer:
-                        self.upper_layer.send_up(
-                            data=connection.get_from_recv_buffer(),
-                            local_port=connection.local_port,
-                            remote_port=connection.remote_port,
-                            remote_ip=connection.remote_ip
-                        )
-                else:
-                    print(f"[{self.name}] Out-of-order segment, expected SEQ {connection.expected_seq}, got {segment.seq_num}")
-                    
-                    # Add to segments to acknowledge
-                    connection.segments_to_ack.add(segment.seq_num)
-                    
-                    # Send duplicate ACK
-                    dup_ack_segment = Segment(
-                        connection.local_port,
-                        connection.remote_port,
-                        connection.seq_num,
-                        connection.expected_seq,
-                        Segment.ACK,
-                        connection.window,
-                        b''
-                    )
-                    
-                    # Send the segment down to the Network layer
-                    if self.lower_layer:
-                        self.lower_layer.send_down(
-                            dup_ack_segment.to_bytes(),
-                            dst_ip=connection.remote_ip,
-                            protocol=6  # TCP
-                        )
-        
-        except Exception as e:
-            print(f"[{self.name}] Error processing segment: {e}")
-            return 
\ No newline at end of file
+                        protocol=PROTO_TCP
+                    )
\ No newline at end of file
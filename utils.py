@@ -1,33 +1,39 @@
 """
 Utility functions for the OSI model simulation.
 """
+import functools
 import json
+import logging
 import random
 import struct
 import socket
-import hashlib
 import uuid
+import zlib
 from typing import Dict, List, Tuple, Any, Union
 
 
+logger = logging.getLogger(__name__)
+
+
 def generate_mac_address() -> str:
     """Generate a random MAC address."""
-    return ':'.join([f'{random.randint(0, 255):02x}' for _ in range(6)])
+    return bytes_to_mac(random.getrandbits(48).to_bytes(6, 'big'))
 
 
 def generate_ip_address() -> str:
     """Generate a random IP address."""
-    return '.'.join([str(random.randint(0, 255)) for _ in range(4)])
+    return bytes_to_ip(random.getrandbits(32).to_bytes(4, 'big'))
 
 
+@functools.lru_cache(maxsize=1)
 def get_system_mac_address() -> str:
-    """Get the actual MAC address of the system."""
+    """Get the actual MAC address of the system; it is only looked up on the first call."""
     try:
         # Get the MAC address using uuid module
         node = uuid.getnode()
         # Check if the node value is valid (if the 8th bit is set, it's invalid)
         if (node >> 8) & 0x1:
-            print(f"[DEBUG] Invalid MAC address detected from uuid.getnode(): {node}")
+            logger.debug("Invalid MAC address detected from uuid.getnode(): %s", node)
             # Try to get MAC from ifconfig on macOS/Linux
             import subprocess
             try:
@@ -35,10 +41,10 @@ def get_system_mac_address() -> str:
                 for line in result.stdout.split('\n'):
                     if 'ether' in line:
                         mac = line.strip().split('ether')[1].strip()
-                        print(f"[DEBUG] MAC address from ifconfig: {mac}")
+                        logger.debug("MAC address from ifconfig: %s", mac)
                         return mac
             except Exception as e:
-                print(f"[DEBUG] Error getting MAC from ifconfig: {e}")
+                logger.debug("Error getting MAC from ifconfig: %s", e)
                 pass
             
             # Default MAC address as last resort
@@ -46,16 +52,17 @@ def get_system_mac_address() -> str:
         
         # Convert the node value to a MAC address
         mac = ':'.join(['{:02x}'.format((node >> ele) & 0xff) for ele in range(0, 48, 8)][::-1])
-        print(f"[DEBUG] MAC address from uuid.getnode(): {mac}")
+        logger.debug("MAC address from uuid.getnode(): %s", mac)
         return mac
     except Exception as e:
-        print(f"[DEBUG] Error in get_system_mac_address: {e}")
+        logger.debug("Error in get_system_mac_address: %s", e)
         # Default MAC address in case we can't get the system's
         return "56:b3:85:ec:00:12"  # Using the first MAC from ifconfig output
 
 
+@functools.lru_cache(maxsize=1)
 def get_system_ip_address() -> str:
-    """Get the actual IP address of the system."""
+    """Get the actual IP address of the system; it is only looked up on the first call."""
     try:
         # Try to get the actual IP address
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -73,60 +80,157 @@ def get_system_ip_address() -> str:
             return "172.16.18.94"  # Using the IP from ifconfig output
 
 
+def mac_to_bytes(mac_address: str) -> bytes:
+    """Pack a colon-separated MAC address into its 6-byte binary form."""
+    return bytes.fromhex(mac_address.replace(':', ''))
+
+
+def bytes_to_mac(mac_bytes: bytes) -> str:
+    """Unpack a 6-byte binary MAC address into colon-separated form."""
+    return ':'.join(format(byte, '02x') for byte in mac_bytes)
+
+
+def ip_to_bytes(ip_address: str) -> bytes:
+    """Pack a dotted-quad IPv4 address (or a resolvable hostname) into its 4-byte binary form."""
+    try:
+        return socket.inet_aton(ip_address)
+    except OSError:
+        # Layers are sometimes handed a hostname such as 'localhost'
+        return socket.inet_aton(socket.gethostbyname(ip_address))
+
+
+def bytes_to_ip(ip_bytes: bytes) -> str:
+    """Unpack a 4-byte binary IPv4 address into dotted-quad form."""
+    return socket.inet_ntoa(ip_bytes)
+
+
 def calculate_checksum(data: bytes) -> bytes:
-    """Calculate a simple checksum for data integrity verification."""
-    return hashlib.md5(data).digest()
+    """Calculate a CRC-32 checksum for data integrity verification."""
+    return zlib.crc32(data).to_bytes(4, 'big')
 
 
-def verify_checksum(data: bytes, checksum: bytes) -> bool:
-    """Verify the checksum of received data."""
-    return hashlib.md5(data).digest() == checksum
+def calculate_checksum_int(data: Union[bytes, List[bytes]]) -> int:
+    """Calculate a CRC-32 checksum as an unsigned 32-bit integer, over one buffer or a list of them."""
+    if isinstance(data, list):
+        checksum = 0
+        for part in data:
+            checksum = zlib.crc32(part, checksum)
+        return checksum
+    return zlib.crc32(data)
+
+
+def verify_checksum(data: bytes, checksum: Union[bytes, int]) -> bool:
+    """Verify the checksum of received data, given as bytes or as an integer."""
+    if isinstance(checksum, int):
+        return zlib.crc32(data) == checksum
+    return zlib.crc32(data).to_bytes(4, 'big') == checksum
 
 
 def bytes_to_bits(data: bytes) -> str:
     """Convert bytes to a string of bits."""
-    return ''.join(format(byte, '08b') for byte in data)
+    if not data:
+        return ''
+    # Format the whole buffer as one integer rather than byte by byte
+    return format(int.from_bytes(data, 'big'), f'0{len(data) * 8}b')
 
 
 def bits_to_bytes(bits: str) -> bytes:
     """Convert a string of bits to bytes."""
-    return bytes(int(bits[i:i+8], 2) for i in range(0, len(bits), 8))
+    # Parse the whole bytes' worth of bits as one integer rather than byte by byte
+    full_length = len(bits) // 8
+    data = int(bits[:full_length * 8], 2).to_bytes(full_length, 'big') if full_length else b''
+    # A trailing partial group of bits becomes one last byte holding their value
+    remainder = bits[full_length * 8:]
+    if remainder:
+        data += bytes([int(remainder, 2)])
+    return data
+
+
+# Shared JSON codec for the wire format: compact separators, and built once so each
+# call goes straight to the C encoder/scanner instead of through json.dumps()/loads().
+# Messages are plain trees of dicts, lists and scalars, so the circular-reference
+# bookkeeping the encoder does for every container is skipped
+_JSON_ENCODER = json.JSONEncoder(separators=(',', ':'), check_circular=False)
+_JSON_DECODER = json.JSONDecoder()
 
 
 def serialize_dict(data: Dict) -> bytes:
     """Serialize a dictionary to bytes."""
-    return json.dumps(data).encode('utf-8')
+    return _JSON_ENCODER.encode(data).encode('utf-8')
 
 
 def deserialize_dict(data: bytes) -> Dict:
-    """Deserialize bytes to a dictionary."""
-    return json.loads(data.decode('utf-8'))
+    """Deserialize bytes (or any buffer, such as a memoryview) to a dictionary."""
+    return _JSON_DECODER.decode(str(data, 'utf-8'))
 
 
-def simple_encrypt(data: bytes, key: int = 42) -> bytes:
-    """Simple XOR encryption for demonstration purposes."""
-    return bytes(b ^ key for b in data)
+# Translation tables for single-byte XOR keys, built the first time each key is used
+_xor_tables: Dict[int, bytes] = {}
 
 
-def simple_decrypt(data: bytes, key: int = 42) -> bytes:
-    """Simple XOR decryption for demonstration purposes."""
-    return bytes(b ^ key for b in data)
+def _xor_table(key: int) -> bytes:
+    """Get the 256-byte translation table that XORs every byte with key."""
+    table = _xor_tables.get(key)
+    if table is None:
+        table = _xor_tables[key] = bytes(byte ^ key for byte in range(256))
+    return table
 
 
-def compress(data: bytes) -> bytes:
+def _xor_bytes(data: bytes, key: Union[int, bytes]) -> bytes:
     """
-    Very simple "compression" for demonstration purposes.
-    In a real implementation, you would use a proper compression algorithm.
+    XOR data with a repeating key.
+    
+    A single-byte key is applied with bytes.translate() and a cached table; longer
+    keys are applied as one big-integer operation.
+    
+    Args:
+        data: The data to XOR
+        key: A single-byte key as an int, or a multi-byte key that is repeated over the data
+        
+    Returns:
+        The XORed data
     """
-    # This is just a placeholder - not real compression
-    return b'COMPRESSED:' + data
+    length = len(data)
+    if not length:
+        return b''
+    key_bytes = bytes([key]) if isinstance(key, int) else bytes(key)
+    if not key_bytes:
+        raise ValueError("XOR key must not be empty")
+    if len(key_bytes) == 1:
+        # translate() is only on bytes/bytearray, so copy other buffers such as memoryviews
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(data)
+        return bytes(data.translate(_xor_table(key_bytes[0])))
+    # Repeat the key to cover the data, then cut it to exactly the data's length
+    keystream = (key_bytes * (length // len(key_bytes) + 1))[:length]
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(keystream, 'big')).to_bytes(length, 'big')
+
+
+def simple_encrypt(data: bytes, key: Union[int, bytes] = 42) -> bytes:
+    """Simple XOR encryption for demonstration purposes; key is a byte value or a key string."""
+    return _xor_bytes(data, key)
+
+
+def simple_decrypt(data: bytes, key: Union[int, bytes] = 42) -> bytes:
+    """Simple XOR decryption for demonstration purposes; key is a byte value or a key string."""
+    # XOR is its own inverse
+    return simple_encrypt(data, key)
+
+
+# zlib settings used by compress(): the fastest level, with a 4 KiB window and reduced
+# memLevel; zlib's defaults allocate ~256 KiB of state per call, which dominates for
+# messages the size this stack sends
+_COMPRESSION_LEVEL = 1
+_COMPRESSION_WBITS = 12
+_COMPRESSION_MEM_LEVEL = 4
+
+
+def compress(data: bytes) -> bytes:
+    """Compress data with zlib at its fastest level."""
+    compressor = zlib.compressobj(_COMPRESSION_LEVEL, zlib.DEFLATED, _COMPRESSION_WBITS, _COMPRESSION_MEM_LEVEL)
+    return compressor.compress(data) + compressor.flush()
 
 
 def decompress(data: bytes) -> bytes:
-    """
-    Very simple "decompression" for demonstration purposes.
-    """
-    # This is just a placeholder - not real decompression
-    if data.startswith(b'COMPRESSED:'):
-        return data[11:]
-    return data 
\ No newline at end of file
+    """Decompress data produced by compress()."""
+    return zlib.decompress(data)